@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the generate-names function.
+
+Starts local stand-ins for Gemini, Domainr and USPTO (see stand_ins.py), serves the function against
+them, drives open-loop load at a fixed request rate and reports throughput, p50/p95/p99 latency,
+upstream calls per request and isolate memory. No network access or real API keys are needed.
+
+By default the function is started with `supabase functions serve`, which runs it in Docker, so the
+stand-ins are reached through host.docker.internal. Pass --functions-url to target a function that is
+already running (it must have been started with the *_API_BASE_URL variables this script prints).
+
+Examples:
+    python benchmarks/load_test.py --rps 5 --duration 30
+    python benchmarks/load_test.py --rps 20 --duration 60 --throttle-rate 0.05 --output after.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stand_ins import add_config_arguments, config_from_arguments, start_stand_ins, stop_stand_ins  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDUSTRIES = ["Technology", "Healthcare", "Finance", "Retail", "Education"]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def http_json(method, url, payload=None, timeout=30):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read() or b"null")
+
+
+def build_stand_in_env(servers, stand_in_host):
+    env = {"GEMINI_API_KEY": "stand-in", "RAPIDAPI_KEY": "stand-in"}
+    for service, variable in (("gemini", "GEMINI_API_BASE_URL"), ("domainr", "DOMAINR_API_BASE_URL"),
+                              ("uspto", "USPTO_API_BASE_URL")):
+        env[variable] = f"http://{stand_in_host}:{servers[service].server_address[1]}"
+    return env
+
+
+def start_function_server(env):
+    """Runs `supabase functions serve` with the stand-in env; returns (process, functions_url)"""
+    env_file = tempfile.NamedTemporaryFile("w", suffix=".env", delete=False)
+    env_file.write("".join(f"{key}={value}\n" for key, value in env.items()))
+    env_file.close()
+    process = subprocess.Popen(
+        ["supabase", "functions", "serve", "--no-verify-jwt", "--env-file", env_file.name],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT,
+    )
+    return process, "http://127.0.0.1:54321/functions/v1"
+
+
+def wait_for_function(functions_url, timeout_s=120):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            return http_json("GET", f"{functions_url}/generate-names?view=metrics", timeout=5)
+        except (urllib.error.URLError, ConnectionError, json.JSONDecodeError):
+            time.sleep(1)
+    raise RuntimeError(f"generate-names did not come up at {functions_url} within {timeout_s}s")
+
+
+def build_payload(i, args):
+    unique = random.Random(i).random() < args.unique_prompts
+    payload = {
+        "business_description": f"Load test venture {i if unique else 0}",
+        "industry": INDUSTRIES[i % len(INDUSTRIES)],
+        "num_suggestions": args.num_suggestions,
+        "founder_name": "Load Tester",
+        "founder_birthdate": "1990-05-17",
+    }
+    if args.mode == "stream":
+        payload["stream"] = True
+    if args.mode == "funnel":
+        payload["funnel"] = True
+    return payload
+
+
+def send_request(url, payload, timeout_s):
+    """Returns (status, total_seconds, first_byte_seconds)"""
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout_s) as response:
+            response.read(1)
+            first_byte = time.perf_counter() - start
+            response.read()
+            return response.status, time.perf_counter() - start, first_byte
+    except urllib.error.HTTPError as error:
+        return error.code, time.perf_counter() - start, None
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return 0, time.perf_counter() - start, None
+
+
+def run_load(functions_url, args):
+    """Open-loop load: request i is sent at start + i / rps regardless of earlier responses"""
+    url = f"{functions_url}/generate-names"
+    total_requests = int(args.rps * args.duration)
+    results = []
+    results_lock = threading.Lock()
+
+    def task(i):
+        outcome = send_request(url, build_payload(i, args), args.timeout)
+        with results_lock:
+            results.append(outcome)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as pool:
+        for i in range(total_requests):
+            delay = start + i / args.rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(task, i)
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed_s, upstream_counts, metrics_before, metrics_after):
+    ok = sorted(total for status, total, _ in results if status == 200)
+    first_bytes = sorted(first for status, _, first in results if status == 200 and first is not None)
+    completed = max(len(results), 1)
+    ms = lambda seconds: round(seconds * 1000, 1)  # noqa: E731
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "elapsedSeconds": round(elapsed_s, 2),
+        "throughputRps": round(len(ok) / elapsed_s, 2) if elapsed_s else 0.0,
+        "latencyMs": {"p50": ms(percentile(ok, 50)), "p95": ms(percentile(ok, 95)),
+                      "p99": ms(percentile(ok, 99)), "max": ms(ok[-1] if ok else 0)},
+        "firstByteMs": {"p50": ms(percentile(first_bytes, 50)), "p95": ms(percentile(first_bytes, 95))},
+        "upstreamCallsPerRequest": {key.split(".")[0]: round(value / completed, 2)
+                                    for key, value in upstream_counts.items() if key.endswith(".calls")},
+        "upstreamOutcomes": upstream_counts,
+        "memory": {"before": metrics_before.get("memory"), "after": metrics_after.get("memory")},
+        "stageLatency": metrics_after.get("latency", {}).get("stages", {}),
+    }
+
+
+def print_report(report):
+    print("\n📊 generate-names load test")
+    print(f"Requests: {report['requests']} ({report['succeeded']} ok, {report['failed']} failed) "
+          f"in {report['elapsedSeconds']}s -> {report['throughputRps']} req/s")
+    latency = report["latencyMs"]
+    print(f"Latency ms: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"First byte ms: p50 {report['firstByteMs']['p50']}  p95 {report['firstByteMs']['p95']}")
+    print("Upstream calls per request: " + ", ".join(
+        f"{service} {count}" for service, count in report["upstreamCallsPerRequest"].items()))
+    memory = report["memory"]["after"] or {}
+    if memory:
+        print(f"Isolate memory: rss {memory.get('rss', 0) / 1e6:.1f} MB, heap {memory.get('heapUsed', 0) / 1e6:.1f} MB")
+    for stage, stats in report["stageLatency"].items():
+        print(f"  {stage:<14} p50 {stats['p50Ms']:>8}  p95 {stats['p95Ms']:>8}  p99 {stats['p99Ms']:>8}  (n={stats['count']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_config_arguments(parser)
+    parser.add_argument("--rps", type=float, default=2.0, help="Requests started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Cap on concurrent client requests")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request client timeout in seconds")
+    parser.add_argument("--num-suggestions", type=int, default=10)
+    parser.add_argument("--unique-prompts", type=float, default=1.0,
+                        help="Fraction of requests with a distinct prompt; the rest repeat one prompt")
+    parser.add_argument("--mode", choices=("json", "stream", "funnel"), default="json")
+    parser.add_argument("--functions-url", help="Use an already running functions server instead of starting one")
+    parser.add_argument("--stand-in-host", default=None,
+                        help="Host the function uses to reach the stand-ins "
+                             "(default: host.docker.internal when starting supabase, else 127.0.0.1)")
+    parser.add_argument("--stand-in-ports", type=int, nargs=3, default=(0, 0, 0), metavar=("GEMINI", "DOMAINR", "USPTO"),
+                        help="Fixed stand-in ports (default: pick free ports)")
+    parser.add_argument("--output", help="Write the report as JSON, for before/after comparisons")
+    args = parser.parse_args()
+
+    servers, counters = start_stand_ins(config_from_arguments(args), host="0.0.0.0", ports=args.stand_in_ports)
+    stand_in_host = args.stand_in_host or ("127.0.0.1" if args.functions_url else "host.docker.internal")
+    env = build_stand_in_env(servers, stand_in_host)
+    process = None
+    try:
+        if args.functions_url:
+            functions_url = args.functions_url.rstrip("/")
+            print("Start the function with these variables so it calls the stand-ins:")
+            for key, value in env.items():
+                print(f"  {key}={value}")
+        else:
+            process, functions_url = start_function_server(env)
+        metrics_before = wait_for_function(functions_url)
+
+        counters.reset()
+        results, elapsed_s = run_load(functions_url, args)
+        upstream_counts = counters.snapshot()
+        metrics_after = http_json("GET", f"{functions_url}/generate-names?view=metrics")
+
+        report = summarize(results, elapsed_s, upstream_counts, metrics_before, metrics_after)
+        report["config"] = vars(args)
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(report, output, indent=2)
+            print(f"\nReport written to {args.output}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        stop_stand_ins(servers)
+
+
+if __name__ == "__main__":
+    main()
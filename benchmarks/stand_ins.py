@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Gemini, Domainr and USPTO APIs used by the generate-names function.
+
+Each stand-in answers the same routes the function calls, with configurable latency, error rate
+and 429 throttling, and counts every call so the load test can report upstream calls per request.
+Answers are deterministic per query, so repeated names hit the same availability results.
+
+Run on its own with:  python benchmarks/stand_ins.py --latency-ms 80 --throttle-rate 0.05
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+NAME_WORDS = ["Vital", "Core", "Nova", "Quantum", "Zen", "Bright", "Path", "Labs", "Apex", "Harbor",
+              "Lumen", "Forge", "Kinetic", "Sage", "Orbit", "Pixel", "Verde", "Summit", "Echo", "Solutions"]
+DOMAIN_TLDS = [".com", ".net", ".org", ".co", ".io", ".biz", ".us"]
+
+
+@dataclass
+class StandInConfig:
+    """Behaviour shared by all three stand-ins"""
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_s: float = 1.0
+    gemini_latency_ms: float = 800.0
+
+
+@dataclass
+class CallCounters:
+    """Thread-safe per-service call counts"""
+    counts: dict = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def increment(self, service, outcome):
+        with self.lock:
+            key = f"{service}.{outcome}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+def stable_fraction(text):
+    """Deterministic value in [0, 1) derived from text"""
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+def make_handler(service, config, counters):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def handle_stats(self):
+            path = urlparse(self.path).path
+            if path == "/__stats" and self.command == "GET":
+                self.send_json(200, counters.snapshot())
+                return True
+            if path == "/__stats/reset" and self.command == "POST":
+                counters.reset()
+                self.send_json(200, {"reset": True})
+                return True
+            return False
+
+        def simulate_upstream(self):
+            """Sleeps for the configured latency; returns False if the call was failed or throttled"""
+            base = config.gemini_latency_ms if service == "gemini" else config.latency_ms
+            time.sleep(max(0.0, base + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000)
+            roll = random.random()
+            if roll < config.throttle_rate:
+                counters.increment(service, "throttled")
+                self.send_json(429, {"message": "Too many requests"}, {"Retry-After": str(config.retry_after_s)})
+                return False
+            if roll < config.throttle_rate + config.error_rate:
+                counters.increment(service, "errors")
+                self.send_json(500, {"message": "Stand-in upstream error"})
+                return False
+            counters.increment(service, "ok")
+            return True
+
+        def do_GET(self):
+            if self.handle_stats():
+                return
+            counters.increment(service, "calls")
+            if not self.simulate_upstream():
+                return
+            parsed = urlparse(self.path)
+            if service == "domainr" and parsed.path == "/v2/search":
+                label = parse_qs(parsed.query).get("query", [""])[0]
+                results = [{"domain": f"{label}{tld}",
+                            "status": "available" if stable_fraction(label + tld) < 0.4 else "active"}
+                           for tld in DOMAIN_TLDS]
+                self.send_json(200, {"results": results})
+            elif service == "uspto" and parsed.path.startswith("/v1/trademarkAvailable/"):
+                term = unquote(parsed.path.rsplit("/", 1)[-1])
+                self.send_json(200, {"available": stable_fraction(term.lower()) >= 0.2})
+            else:
+                self.send_json(404, {"message": f"No stand-in route for GET {parsed.path}"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            if self.handle_stats():
+                return
+            counters.increment(service, "calls")
+            if not self.simulate_upstream():
+                return
+            if service != "gemini" or not urlparse(self.path).path.endswith(":generateContent"):
+                self.send_json(404, {"message": f"No stand-in route for POST {self.path}"})
+                return
+            prompt = json.loads(body or b"{}")["contents"][0]["parts"][0]["text"]
+            match = re.search(r"Generate (\d+)", prompt)
+            count = int(match.group(1)) if match else 10
+            rng = random.Random(prompt)
+            names = [" ".join(rng.sample(NAME_WORDS, rng.randint(1, 3))) for _ in range(count)]
+            self.send_json(200, {"candidates": [{"content": {"parts": [{"text": json.dumps(names)}]}}]})
+
+    return StandInHandler
+
+
+def start_stand_ins(config, host="127.0.0.1", ports=(0, 0, 0)):
+    """Starts the Gemini, Domainr and USPTO stand-ins on background threads.
+
+    Returns (servers, counters) where servers maps service name to its ThreadingHTTPServer.
+    Port 0 picks a free port; read it back from server.server_address.
+    """
+    counters = CallCounters()
+    servers = {}
+    for service, port in zip(("gemini", "domainr", "uspto"), ports):
+        server = ThreadingHTTPServer((host, port), make_handler(service, config, counters))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[service] = server
+    return servers, counters
+
+
+def stop_stand_ins(servers):
+    for server in servers.values():
+        server.shutdown()
+        server.server_close()
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Domainr/USPTO response latency")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0, help="Gemini response latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Uniform +/- latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--retry-after-s", type=float, default=1.0, help="Retry-After sent with each 429")
+
+
+def config_from_arguments(args):
+    return StandInConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                         throttle_rate=args.throttle_rate, retry_after_s=args.retry_after_s,
+                         gemini_latency_ms=args.gemini_latency_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_config_arguments(parser)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--ports", type=int, nargs=3, default=(9101, 9102, 9103), metavar=("GEMINI", "DOMAINR", "USPTO"))
+    args = parser.parse_args()
+
+    servers, _ = start_stand_ins(config_from_arguments(args), args.host, args.ports)
+    for service, server in servers.items():
+        print(f"{service} stand-in listening on port {server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stop_stand_ins(servers)
+
+
+if __name__ == "__main__":
+    main()
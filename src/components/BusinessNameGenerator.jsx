@@ -6,6 +6,42 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from './ui/AlignUI';
 import { Sparkles, Search, Calendar as CalendarIcon, User, Building, TrendingUp } from 'lucide-react';
 import { mockGeneratedNames, mockFounderAnalysis, mockOptimalDates, usStates, industries, entityTypes } from '../mockData';
 
+// Reads an application/x-ndjson response body and calls onFrame for each parsed line.
+const readNdjsonStream = async (response, onFrame) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    lines.filter(line => line.trim()).forEach(line => onFrame(JSON.parse(line)));
+    if (done) break;
+  }
+  if (buffered.trim()) onFrame(JSON.parse(buffered));
+};
+
+const byOverallScore = (a, b) => (b.overallScore || 0) - (a.overallScore || 0);
+
+// Compact responses send numerology meanings as keys into a shared dictionary and domain maps as
+// { tld: points } (0 = taken); these restore the shapes the result cards render.
+const expandNumerology = (numerology, meanings) => numerology && Object.fromEntries(
+  Object.entries(numerology).map(([system, block]) => [
+    system,
+    block && block.meaningRef !== undefined ? { ...block, meaning: meanings[block.meaningRef] } : block
+  ])
+);
+
+const expandCompactName = (nameData, meanings) => ({
+  ...nameData,
+  numerology: expandNumerology(nameData.numerology, meanings),
+  domainAvailability: Object.fromEntries(Object.entries(nameData.domainAvailability || {}).map(([tld, points]) => [
+    tld,
+    typeof points === 'number' ? { available: points > 0, value: points } : points
+  ]))
+});
+
 const BusinessNameGenerator = () => {
   const [formData, setFormData] = useState({
     businessDescription: '',
@@ -21,6 +57,7 @@ const BusinessNameGenerator = () => {
   
   const [results, setResults] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [activeTab, setActiveTab] = useState('generator');
 
   // LocalStorage keys
@@ -59,19 +96,45 @@ const BusinessNameGenerator = () => {
     }));
   };
 
+  const functionsBaseUrl = process.env.REACT_APP_SUPABASE_FUNCTIONS_URL || 'https://vienbkxwzkglrtwigjfj.supabase.co/functions/v1';
+
+  // Fetches the next page of a paginated compact result
+  const loadMoreNames = async () => {
+    if (!results?.nextPage) return;
+    setLoadingMore(true);
+    try {
+      const response = await fetch(`${functionsBaseUrl}/generate-names/${results.nextPage}`);
+      if (!response.ok) {
+        throw new Error(`API Error: ${response.status}`);
+      }
+      const data = await response.json();
+      setResults(prev => ({
+        ...prev,
+        names: [...prev.names, ...data.names.map(nameData => expandCompactName(nameData, prev.meanings))],
+        nextPage: data.page.next
+      }));
+    } catch (error) {
+      console.error('Error loading more names:', error);
+      setResults(prev => ({ ...prev, nextPage: null }));
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const generateNames = async () => {
     setLoading(true);
     setResults(null); // Clear previous results before new API call
     
     try {
-      const functionsBaseUrl = process.env.REACT_APP_SUPABASE_FUNCTIONS_URL || 'https://vienbkxwzkglrtwigjfj.supabase.co/functions/v1';
-      
       const response = await fetch(`${functionsBaseUrl}/generate-names`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Accept': 'application/x-ndjson',
         },
         body: JSON.stringify({
+          stream: true,
+          compact: true,
           business_description: formData.businessDescription,
           industry: formData.industry,
           include_keywords: formData.includeKeywords,
@@ -88,14 +151,43 @@ const BusinessNameGenerator = () => {
         throw new Error(`API Error: ${response.status}`);
       }
 
-      const data = await response.json();
-      
-      setResults({
-        names: data.names,
-        founderAnalysis: data.founderAnalysis,
-        optimalDates: data.optimalDates
-      });
+      if (!(response.headers.get('Content-Type') || '').includes('application/x-ndjson')) {
+        const data = await response.json();
+        const meanings = data.dictionary?.meanings || {};
+
+        setResults({
+          names: data.names.map(nameData => expandCompactName(nameData, meanings)),
+          founderAnalysis: data.founderAnalysis && { ...data.founderAnalysis, numerology: expandNumerology(data.founderAnalysis.numerology, meanings) },
+          optimalDates: data.optimalDates,
+          meanings,
+          nextPage: data.page?.next || null
+        });
+        setActiveTab('results');
+        return;
+      }
+
+      // Render each name as soon as the server finishes analyzing it
+      setResults({ names: [], founderAnalysis: null, optimalDates: [] });
       setActiveTab('results');
+      let meanings = {};
+      await readNdjsonStream(response, ({ type, data }) => {
+        if (type === 'dictionary') {
+          meanings = data.meanings;
+        } else if (type === 'name') {
+          const nameData = expandCompactName(data, meanings);
+          setResults(prev => ({ ...prev, names: [...prev.names, nameData].sort(byOverallScore) }));
+        } else if (type === 'founderAnalysis') {
+          const founderAnalysis = data && { ...data, numerology: expandNumerology(data.numerology, meanings) };
+          setResults(prev => ({ ...prev, founderAnalysis }));
+        } else if (type === 'optimalDates') {
+          setResults(prev => ({ ...prev, optimalDates: data }));
+        } else if (type === 'summary') {
+          const rank = new Map(data.ranking.map((entry, position) => [entry.id, position]));
+          setResults(prev => ({ ...prev, names: [...prev.names].sort((a, b) => rank.get(a.id) - rank.get(b.id)) }));
+        } else if (type === 'error') {
+          throw new Error(data.detail || data.error);
+        }
+      });
       
     } catch (error) {
       console.error('Error generating names:', error);
@@ -509,6 +601,16 @@ const BusinessNameGenerator = () => {
                     </CardContent>
                   </Card>
                 ))}
+                {results.nextPage && (
+                  <Button
+                    onClick={loadMoreNames}
+                    disabled={loadingMore}
+                    variant="secondary"
+                    className="w-full"
+                  >
+                    {loadingMore ? 'Loading more names...' : 'Load more names'}
+                  </Button>
+                )}
               </div>
             ) : (
               <Card className="max-w-2xl mx-auto">
@@ -522,7 +624,7 @@ const BusinessNameGenerator = () => {
           </TabsContent>
 
           <TabsContent value="founder" activeTab={activeTab}>
-            {results ? (
+            {results?.founderAnalysis ? (
               <Card className="max-w-4xl mx-auto">
                 <CardHeader>
                   <CardTitle className="flex items-center gap-2">
@@ -0,0 +1,74 @@
+// @ts-check
+// Shared module: incrementally maintained analytics
+// Every generation upserts running totals, an hourly request bucket, its industry's count and its
+// session's history in Postgres (supabase/migrations/*_generation_analytics.sql) through one RPC, so
+// reads never rescan past generations and every isolate reports the same figures. Industries are a
+// bounded top-K sketch of INDUSTRY_SKETCH_SIZE counters, as before.
+//
+// Session ids are issued by the database. A session_id sent by the client is only honoured when it
+// names a live session issued there; anything else starts a new one. History stores scores and
+// domain/trademark results only, never the founder's name, birthdate or the business description.
+
+import { readIntEnv } from "./cache.ts";
+import { callRpc, isDatabaseConfigured, isUuid } from "./database.ts";
+
+const TOP_INDUSTRIES = 10;
+const INDUSTRY_SKETCH_SIZE = readIntEnv("ANALYTICS_INDUSTRY_SKETCH_SIZE", 64);
+const MAX_INDUSTRY_LENGTH = 100;
+const HISTORY_NAMES_PER_SESSION = readIntEnv("HISTORY_NAMES_PER_SESSION", 500);
+const HISTORY_TTL_SECONDS = readIntEnv("HISTORY_TTL_SECONDS", 24 * 60 * 60);
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 200;
+
+export function isAnalyticsEnabled() {
+    return isDatabaseConfigured();
+}
+
+function normalizeIndustry(industry) {
+    return String(industry ?? '').trim().replace(/\s+/g, ' ').slice(0, MAX_INDUSTRY_LENGTH) || 'Unspecified';
+}
+
+function parseSessionId(sessionId) {
+    return isUuid(sessionId) ? sessionId.toLowerCase() : null;
+}
+
+function summarizeName(nameData) {
+    return {
+        name: nameData.name,
+        overallScore: nameData.overallScore,
+        scoreBreakdown: nameData.scoreBreakdown,
+        domainAvailability: nameData.domainAvailability,
+        trademarkStatus: nameData.trademark?.status ?? null
+    };
+}
+
+// Resolves to the session id the generation was stored under, or null when analytics are disabled
+export async function recordGeneration(sessionId, requestData, analyzedNames) {
+    if (!isDatabaseConfigured()) return null;
+    return callRpc('record_generation', {
+        p_session_id: parseSessionId(sessionId),
+        p_industry: normalizeIndustry(requestData.industry),
+        p_names: analyzedNames.map(summarizeName),
+        p_keep_names: HISTORY_NAMES_PER_SESSION,
+        p_session_ttl_seconds: HISTORY_TTL_SECONDS,
+        p_industry_slots: INDUSTRY_SKETCH_SIZE
+    });
+}
+
+export function getAnalyticsSummary() {
+    return callRpc('analytics_summary', { p_top: TOP_INDUSTRIES });
+}
+
+// Resolves to null for unknown or expired sessions
+export async function getGenerationHistory(sessionId, { offset = 0, limit = DEFAULT_PAGE_SIZE } = {}) {
+    const id = parseSessionId(sessionId);
+    if (!id) return null;
+    const start = Math.max(0, Math.floor(Number(offset)) || 0);
+    const size = Math.min(MAX_PAGE_SIZE, Math.max(1, Math.floor(Number(limit)) || DEFAULT_PAGE_SIZE));
+    const history = await callRpc('generation_history', {
+        p_session_id: id, p_offset: start, p_limit: size, p_session_ttl_seconds: HISTORY_TTL_SECONDS
+    });
+    if (!history) return null;
+    const end = start + history.generatedNames.length;
+    return { ...history, offset: start, limit: size, nextOffset: end < history.storedNames ? end : null };
+}
@@ -0,0 +1,71 @@
+// @ts-check
+// Shared module: bounded TTL + LRU cache
+// Module-level caches live as long as the isolate, so warm invocations share them.
+
+export function createTtlCache({ maxEntries = 1000, ttlMs = 60 * 60 * 1000 } = {}) {
+    // Map iteration order is insertion order; re-inserting on read keeps the oldest entry first.
+    const entries = new Map();
+    const stats = { hits: 0, misses: 0, evictions: 0, expirations: 0, coalesced: 0 };
+
+    function get(key) {
+        const entry = entries.get(key);
+        if (!entry) { stats.misses++; return undefined; }
+        if (entry.expiresAt <= Date.now()) {
+            entries.delete(key);
+            stats.expirations++; stats.misses++;
+            return undefined;
+        }
+        entries.delete(key);
+        entries.set(key, entry);
+        stats.hits++;
+        return entry.value;
+    }
+
+    function set(key, value, entryTtlMs = ttlMs) {
+        entries.delete(key);
+        entries.set(key, { value, expiresAt: Date.now() + entryTtlMs });
+        while (entries.size > maxEntries) {
+            entries.delete(entries.keys().next().value);
+            stats.evictions++;
+        }
+    }
+
+    // Single-flight load: concurrent callers for the same key share one loader call.
+    // The loader resolves to { value, ttlMs? }; ttlMs overrides the default TTL for that entry, and a
+    // ttlMs of 0 hands the value to the waiting callers without caching it.
+    const inflight = new Map();
+    async function getOrLoad(key, loader) {
+        const cached = get(key);
+        if (cached !== undefined) return { value: cached, source: 'cache' };
+        const pending = inflight.get(key);
+        if (pending) {
+            stats.coalesced++;
+            return { value: await pending, source: 'inflight' };
+        }
+        const load = (async () => {
+            const loaded = await loader();
+            if (loaded.ttlMs !== 0) set(key, loaded.value, loaded.ttlMs ?? ttlMs);
+            return loaded.value;
+        })();
+        inflight.set(key, load);
+        try {
+            return { value: await load, source: 'upstream' };
+        } finally {
+            inflight.delete(key);
+        }
+    }
+
+    return {
+        get,
+        set,
+        getOrLoad,
+        delete: (key) => entries.delete(key),
+        clear: () => entries.clear(),
+        stats: () => ({ ...stats, size: entries.size, inflight: inflight.size, maxEntries, ttlMs })
+    };
+}
+
+export function readIntEnv(name, fallback) {
+    const value = parseInt(Deno.env.get(name) ?? '', 10);
+    return Number.isFinite(value) && value >= 0 ? value : fallback;
+}
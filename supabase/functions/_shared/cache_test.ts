@@ -0,0 +1,77 @@
+// @ts-check
+// Tests: bounded TTL + LRU cache
+// Run with: deno test supabase/functions/_shared/cache_test.ts
+
+import { assertEquals, assertRejects } from "https://deno.land/std@0.224.0/assert/mod.ts";
+import { createTtlCache } from "./cache.ts";
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+Deno.test("getOrLoad runs one loader for concurrent callers of the same key", async () => {
+    const cache = createTtlCache({ maxEntries: 10, ttlMs: 60000 });
+    let loads = 0;
+    const loader = async () => {
+        loads++;
+        await sleep(20);
+        return { value: `value-${loads}` };
+    };
+    const results = await Promise.all([cache.getOrLoad("k", loader), cache.getOrLoad("k", loader), cache.getOrLoad("k", loader)]);
+    assertEquals(loads, 1);
+    assertEquals(results.map(r => r.value), ["value-1", "value-1", "value-1"]);
+    assertEquals(results.map(r => r.source), ["upstream", "inflight", "inflight"]);
+    assertEquals((await cache.getOrLoad("k", loader)).source, "cache");
+    assertEquals(cache.stats().coalesced, 2);
+});
+
+Deno.test("a ttlMs of 0 hands the value to waiters without caching it", async () => {
+    const cache = createTtlCache();
+    let loads = 0;
+    const loader = async () => ({ value: ++loads, ttlMs: 0 });
+    assertEquals((await cache.getOrLoad("k", loader)).value, 1);
+    assertEquals((await cache.getOrLoad("k", loader)).value, 2);
+    assertEquals(cache.stats().size, 0);
+});
+
+Deno.test("a failed load rejects every waiter and is retried by the next call", async () => {
+    const cache = createTtlCache();
+    let loads = 0;
+    const failing = async () => {
+        loads++;
+        await sleep(10);
+        throw new Error("upstream down");
+    };
+    await Promise.all([
+        assertRejects(() => cache.getOrLoad("k", failing), Error, "upstream down"),
+        assertRejects(() => cache.getOrLoad("k", failing), Error, "upstream down")
+    ]);
+    assertEquals(loads, 1);
+    assertEquals(cache.stats().inflight, 0);
+    const { value, source } = await cache.getOrLoad("k", async () => ({ value: "recovered" }));
+    assertEquals([value, source], ["recovered", "upstream"]);
+});
+
+Deno.test("a loader that throws synchronously does not leave the key stuck in flight", async () => {
+    const cache = createTtlCache();
+    const throwing = () => { throw new Error("sync failure"); };
+    await assertRejects(() => cache.getOrLoad("k", /** @type {any} */ (throwing)), Error, "sync failure");
+    assertEquals(cache.stats().inflight, 0);
+});
+
+Deno.test("entries expire after their TTL", async () => {
+    const cache = createTtlCache({ ttlMs: 20 });
+    cache.set("k", "v");
+    assertEquals(cache.get("k"), "v");
+    await sleep(30);
+    assertEquals(cache.get("k"), undefined);
+    assertEquals(cache.stats().expirations, 1);
+});
+
+Deno.test("the least recently used entry is evicted first", () => {
+    const cache = createTtlCache({ maxEntries: 2 });
+    cache.set("a", 1);
+    cache.set("b", 2);
+    cache.get("a"); // "b" is now the oldest
+    cache.set("c", 3);
+    assertEquals([cache.get("a"), cache.get("b"), cache.get("c")], [1, undefined, 3]);
+    assertEquals(cache.stats().evictions, 1);
+});
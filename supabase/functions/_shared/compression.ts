@@ -0,0 +1,50 @@
+// @ts-check
+// Shared module: response compression
+// Picks a Content-Encoding from the request's Accept-Encoding (honouring q-values) among the formats
+// this runtime's CompressionStream supports, preferring brotli where it is available, and compresses
+// buffered bodies above MIN_COMPRESS_BYTES. Streamed responses are left alone: a compressor would
+// hold frames back until its buffer fills.
+
+const PREFERRED_ENCODINGS = ['br', 'gzip', 'deflate'];
+const MIN_COMPRESS_BYTES = 1024;
+const SUPPORTED_ENCODINGS = PREFERRED_ENCODINGS.filter(encoding => {
+    try {
+        new CompressionStream(/** @type {any} */ (encoding));
+        return true;
+    } catch {
+        return false;
+    }
+});
+
+export function negotiateEncoding(acceptEncoding) {
+    if (!acceptEncoding) return null;
+    const weights = new Map();
+    acceptEncoding.split(',').forEach(part => {
+        const [token, ...params] = part.trim().toLowerCase().split(';');
+        const quality = params.map(param => param.trim()).find(param => param.startsWith('q='));
+        weights.set(token.trim(), quality ? Number(quality.slice(2)) || 0 : 1);
+    });
+    let best = null;
+    let bestWeight = 0;
+    SUPPORTED_ENCODINGS.forEach(encoding => {
+        const weight = weights.get(encoding) ?? weights.get('*') ?? 0;
+        if (weight > bestWeight) { best = encoding; bestWeight = weight; }
+    });
+    return best;
+}
+
+async function compress(bytes, encoding) {
+    const stream = new Blob([bytes]).stream().pipeThrough(new CompressionStream(encoding));
+    return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+// Builds a Response for an already serialized body, compressed when the client accepts it
+export async function createEncodedResponse(req, body, init) {
+    const headers = new Headers(init.headers);
+    headers.append('Vary', 'Accept-Encoding');
+    const bytes = new TextEncoder().encode(body);
+    const encoding = bytes.length >= MIN_COMPRESS_BYTES ? negotiateEncoding(req.headers.get('accept-encoding')) : null;
+    if (!encoding) return new Response(bytes, { ...init, headers });
+    headers.set('Content-Encoding', encoding);
+    return new Response(await compress(bytes, encoding), { ...init, headers });
+}
@@ -0,0 +1,47 @@
+// @ts-check
+// Shared module: Postgres access over PostgREST RPC
+// Calls the SQL functions defined in supabase/migrations through /rest/v1/rpc/<name>, authenticated
+// with the service role key Supabase injects into every edge function. Without SUPABASE_URL and
+// SUPABASE_SERVICE_ROLE_KEY (e.g. a bare local run) isDatabaseConfigured() is false and callers
+// skip whatever they would have stored.
+
+import { readIntEnv } from "./cache.ts";
+
+const SUPABASE_URL = Deno.env.get("SUPABASE_URL");
+const SERVICE_ROLE_KEY = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY");
+const DATABASE_TIMEOUT_MS = readIntEnv("DATABASE_TIMEOUT_MS", 3000);
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+export function isDatabaseConfigured() {
+    return Boolean(SUPABASE_URL && SERVICE_ROLE_KEY);
+}
+
+// Ids from the client are checked before they reach a uuid parameter, which would reject them with a 400
+export function isUuid(value) {
+    return typeof value === 'string' && UUID_PATTERN.test(value);
+}
+
+// Resolves to the function's JSON result; rejects on a non-2xx answer or after DATABASE_TIMEOUT_MS
+export async function callRpc(name, args = {}) {
+    if (!isDatabaseConfigured()) throw new Error("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are not set");
+    const response = await fetch(`${SUPABASE_URL}/rest/v1/rpc/${name}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            apikey: SERVICE_ROLE_KEY,
+            Authorization: `Bearer ${SERVICE_ROLE_KEY}`
+        },
+        body: JSON.stringify(args),
+        signal: AbortSignal.timeout(DATABASE_TIMEOUT_MS)
+    });
+    if (!response.ok) throw new Error(`RPC ${name} failed with ${response.status}: ${await response.text()}`);
+    const text = await response.text();
+    return text ? JSON.parse(text) : null;
+}
+
+// Keeps a write running after the response has gone out. Supabase's Edge Runtime keeps the isolate
+// alive for promises passed to EdgeRuntime.waitUntil; elsewhere the promise just runs to completion.
+export function runInBackground(promise, label) {
+    const settled = promise.catch(e => console.error(`Error in background ${label}:`, e));
+    globalThis.EdgeRuntime?.waitUntil(settled);
+}
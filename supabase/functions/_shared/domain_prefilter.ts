@@ -0,0 +1,158 @@
+// @ts-check
+// Shared module: registered-domain prefilter
+// A Bloom filter over a local list of registered domains (e.g. extracted from zone files), built
+// offline and loaded once per isolate from DOMAIN_PREFILTER_PATH. A hit means the domain is
+// registered, up to the false-positive rate chosen at build time; a miss means it is not in the
+// list. Only the TLDs present in the source list are covered; other TLDs never hit.
+//
+// Build with:
+//   deno run --allow-read --allow-write supabase/functions/_shared/domain_prefilter.ts \
+//     registered.txt domains.bloom --fp-rate 0.01
+// where registered.txt has one domain per line (example.com).
+//
+// File layout: "DPF1", a little-endian uint32 header length, the JSON header
+// { bits, hashes, count, fpRate, tlds }, then the bit array.
+
+const MAGIC = "DPF1";
+const DEFAULT_FP_RATE = 0.01;
+
+// Two independent 32-bit hashes combined as h1 + i * h2 (Kirsch-Mitzenmacher double hashing)
+function hashPair(text) {
+    let h1 = 0x811c9dc5;
+    let h2 = 0x9747b28c;
+    for (let i = 0; i < text.length; i++) {
+        const c = text.charCodeAt(i);
+        h1 = Math.imul(h1 ^ c, 0x01000193);
+        h2 = Math.imul(h2 ^ c, 0x5bd1e995);
+        h2 ^= h2 >>> 15;
+    }
+    h2 = Math.imul(h2 ^ (h2 >>> 13), 0xc2b2ae35);
+    return [h1 >>> 0, (h2 ^ (h2 >>> 16)) >>> 0 | 1];
+}
+
+function bitPositions(filter, domain, fn) {
+    const [h1, h2] = hashPair(domain);
+    for (let i = 0; i < filter.hashes; i++) fn((h1 + Math.imul(i, h2) >>> 0) % filter.bits);
+}
+
+export function normalizeDomain(domain) {
+    return String(domain).trim().toLowerCase().replace(/\.$/, '');
+}
+
+function tldOf(domain) {
+    const dot = domain.indexOf('.');
+    return dot === -1 ? null : domain.slice(dot);
+}
+
+// Optimal size for n entries at false-positive rate p: m = -n ln p / (ln 2)^2, k = m / n ln 2
+export function createDomainFilter(expectedCount, fpRate = DEFAULT_FP_RATE) {
+    const count = Math.max(1, expectedCount);
+    const bits = Math.max(64, Math.ceil(-count * Math.log(fpRate) / (Math.LN2 * Math.LN2)));
+    const hashes = Math.max(1, Math.round(bits / count * Math.LN2));
+    return { bits, hashes, count: 0, fpRate, tlds: [], array: new Uint8Array(Math.ceil(bits / 8)) };
+}
+
+export function addDomain(filter, domain) {
+    const normalized = normalizeDomain(domain);
+    const tld = tldOf(normalized);
+    if (!tld) return;
+    if (!filter.tlds.includes(tld)) filter.tlds.push(tld);
+    bitPositions(filter, normalized, position => { filter.array[position >>> 3] |= 1 << (position & 7); });
+    filter.count++;
+}
+
+export function mightBeRegistered(filter, domain) {
+    const normalized = normalizeDomain(domain);
+    if (!filter.tlds.includes(tldOf(normalized))) return false;
+    let hit = true;
+    bitPositions(filter, normalized, position => {
+        if ((filter.array[position >>> 3] & (1 << (position & 7))) === 0) hit = false;
+    });
+    return hit;
+}
+
+export function serializeDomainFilter(filter) {
+    const header = new TextEncoder().encode(JSON.stringify({
+        bits: filter.bits, hashes: filter.hashes, count: filter.count, fpRate: filter.fpRate, tlds: filter.tlds
+    }));
+    const bytes = new Uint8Array(8 + header.length + filter.array.length);
+    bytes.set(new TextEncoder().encode(MAGIC), 0);
+    new DataView(bytes.buffer).setUint32(4, header.length, true);
+    bytes.set(header, 8);
+    bytes.set(filter.array, 8 + header.length);
+    return bytes;
+}
+
+export function parseDomainFilter(bytes) {
+    if (new TextDecoder().decode(bytes.subarray(0, 4)) !== MAGIC) throw new Error("Not a domain prefilter file");
+    const headerLength = new DataView(bytes.buffer, bytes.byteOffset).getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)));
+    const array = bytes.subarray(8 + headerLength);
+    if (array.length < Math.ceil(header.bits / 8)) throw new Error("Domain prefilter file is truncated");
+    return { ...header, array };
+}
+
+// --- Isolate Filter ---
+let filterPromise = null;
+const filterStats = { path: null, loaded: false, domains: 0, tlds: [], bytes: 0, fpRate: null, loadMs: 0, lookups: 0, hits: 0, error: null };
+
+// Resolves to the filter, or null when DOMAIN_PREFILTER_PATH is unset or the file cannot be read
+export function loadDomainPrefilter() {
+    if (filterPromise) return filterPromise;
+    const path = Deno.env.get("DOMAIN_PREFILTER_PATH");
+    filterStats.path = path ?? null;
+    if (!path) return (filterPromise = Promise.resolve(null));
+    filterPromise = (async () => {
+        const start = performance.now();
+        try {
+            const filter = parseDomainFilter(await Deno.readFile(path));
+            Object.assign(filterStats, {
+                loaded: true, domains: filter.count, tlds: filter.tlds, bytes: filter.array.length,
+                fpRate: filter.fpRate, loadMs: Math.round(performance.now() - start)
+            });
+            console.log(`Domain prefilter loaded: ${filter.count} domains across ${filter.tlds.join(', ')}`);
+            return filter;
+        } catch (e) {
+            filterStats.error = e.message;
+            console.error(`Could not load domain prefilter from ${path}:`, e);
+            return null;
+        }
+    })();
+    return filterPromise;
+}
+
+// TLDs of `label` the filter reports as registered, among `tlds`
+export function findRegisteredTlds(filter, label, tlds) {
+    const registered = tlds.filter(tld => mightBeRegistered(filter, `${label}${tld}`));
+    filterStats.lookups += tlds.length;
+    filterStats.hits += registered.length;
+    return registered;
+}
+
+export function getDomainPrefilterStats() {
+    return { ...filterStats };
+}
+// --- End Isolate Filter ---
+
+// --- Build CLI ---
+async function buildFromList(inputPath, outputPath, fpRate) {
+    const lines = (await Deno.readTextFile(inputPath)).split('\n').filter(line => line.trim() && !line.startsWith('#'));
+    const filter = createDomainFilter(lines.length, fpRate);
+    lines.forEach(line => addDomain(filter, line));
+    const bytes = serializeDomainFilter(filter);
+    await Deno.writeFile(outputPath, bytes);
+    console.log(`Wrote ${outputPath}: ${filter.count} domains, ${filter.tlds.join(', ')}, ` +
+        `${bytes.length} bytes, ${filter.hashes} hashes, target false-positive rate ${fpRate}`);
+}
+
+if (import.meta.main) {
+    const [inputPath, outputPath, ...flags] = Deno.args;
+    const fpFlag = flags.indexOf('--fp-rate');
+    const fpRate = fpFlag === -1 ? DEFAULT_FP_RATE : Number(flags[fpFlag + 1]);
+    if (!inputPath || !outputPath || !(fpRate > 0 && fpRate < 1)) {
+        console.error("Usage: domain_prefilter.ts <registered-domains.txt> <output.bloom> [--fp-rate 0.01]");
+    } else {
+        await buildFromList(inputPath, outputPath, fpRate);
+    }
+}
+// --- End Build CLI ---
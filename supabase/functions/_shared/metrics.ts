@@ -0,0 +1,92 @@
+// @ts-check
+// Shared module: latency metrics
+// Stage timers produce a Server-Timing header per request; every span is also fed into rolling
+// per-isolate histograms (last HISTOGRAM_WINDOW samples per key) that the metrics view reports.
+
+const HISTOGRAM_WINDOW = 1024;
+const histograms = new Map();
+const isolateStartedAt = new Date().toISOString();
+
+export function recordLatency(kind, name, durationMs) {
+    const key = `${kind}:${name}`;
+    let histogram = histograms.get(key);
+    if (!histogram) {
+        histogram = { kind, name, samples: new Float64Array(HISTOGRAM_WINDOW), next: 0, count: 0, total: 0 };
+        histograms.set(key, histogram);
+    }
+    histogram.samples[histogram.next] = durationMs;
+    histogram.next = (histogram.next + 1) % HISTOGRAM_WINDOW;
+    histogram.count++;
+    histogram.total += durationMs;
+}
+
+function percentile(sorted, p) {
+    if (sorted.length === 0) return 0;
+    return sorted[Math.min(sorted.length - 1, Math.ceil(p * sorted.length) - 1)];
+}
+
+const round = (ms) => Math.round(ms * 10) / 10;
+
+export function getLatencySnapshot() {
+    const snapshot = { isolateStartedAt, window: HISTOGRAM_WINDOW, stages: {}, upstream: {} };
+    histograms.forEach(histogram => {
+        const windowSize = Math.min(histogram.count, HISTOGRAM_WINDOW);
+        const sorted = histogram.samples.slice(0, windowSize).sort();
+        const target = histogram.kind === 'upstream' ? snapshot.upstream : snapshot.stages;
+        target[histogram.name] = {
+            count: histogram.count,
+            meanMs: round(histogram.total / histogram.count),
+            p50Ms: round(percentile(sorted, 0.5)),
+            p95Ms: round(percentile(sorted, 0.95)),
+            p99Ms: round(percentile(sorted, 0.99)),
+            maxMs: round(sorted[windowSize - 1] ?? 0)
+        };
+    });
+    return snapshot;
+}
+
+// Per-request stage timer. A stage that runs once per name (e.g. domains) is reported with its
+// wall-clock span from first start to last end, plus the number of calls and their summed time.
+export function createStageTimer() {
+    const requestStart = performance.now();
+    const stages = new Map();
+
+    function record(stage, start, end) {
+        const entry = stages.get(stage) ?? { count: 0, totalMs: 0, firstStart: start, lastEnd: end };
+        entry.count++;
+        entry.totalMs += end - start;
+        entry.firstStart = Math.min(entry.firstStart, start);
+        entry.lastEnd = Math.max(entry.lastEnd, end);
+        stages.set(stage, entry);
+        recordLatency('stage', stage, end - start);
+    }
+
+    async function time(stage, fn) {
+        const start = performance.now();
+        try { return await fn(); } finally { record(stage, start, performance.now()); }
+    }
+
+    function timeSync(stage, fn) {
+        const start = performance.now();
+        try { return fn(); } finally { record(stage, start, performance.now()); }
+    }
+
+    function summary() {
+        const result = { totalMs: round(performance.now() - requestStart) };
+        stages.forEach((entry, stage) => {
+            result[stage] = { wallMs: round(entry.lastEnd - entry.firstStart), count: entry.count, sumMs: round(entry.totalMs) };
+        });
+        return result;
+    }
+
+    function serverTimingHeader() {
+        const parts = [];
+        stages.forEach((entry, stage) => {
+            parts.push(`${stage};dur=${round(entry.lastEnd - entry.firstStart)};desc="${entry.count} call${entry.count === 1 ? '' : 's'}"`);
+        });
+        parts.push(`total;dur=${round(performance.now() - requestStart)}`);
+        return parts.join(', ');
+    }
+
+    return { time, timeSync, summary, serverTimingHeader, finish: () => recordLatency('stage', 'total', performance.now() - requestStart) };
+}
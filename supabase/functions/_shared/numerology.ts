@@ -0,0 +1,357 @@
+// @ts-check
+// Shared module: numerology (adapted from previous numerology.js)
+
+import { createTtlCache } from "./cache.ts";
+
+const PYTHAGOREAN = {
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8, 'I': 9,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'O': 6, 'P': 7, 'Q': 8, 'R': 9,
+    'S': 1, 'T': 2, 'U': 3, 'V': 4, 'W': 5, 'X': 6, 'Y': 7, 'Z': 8
+};
+const CHALDEAN = { /* ... (same as before) ... */ 
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 8, 'G': 3, 'H': 5, 'I': 1,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'O': 7, 'P': 8, 'Q': 1, 'R': 2,
+    'S': 3, 'T': 4, 'U': 6, 'V': 6, 'W': 6, 'X': 5, 'Y': 1, 'Z': 7
+};
+const KABBALISTIC = { /* ... (same as before) ... */ 
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8, 'I': 9,
+    'J': 10, 'K': 11, 'L': 12, 'M': 13, 'N': 14, 'O': 15, 'P': 16, 'Q': 17, 'R': 18,
+    'S': 19, 'T': 20, 'U': 21, 'V': 22, 'W': 23, 'X': 24, 'Y': 25, 'Z': 26
+};
+export const MASTER_NUMBERS = new Set([11, 22, 33, 44, 55, 66, 77, 88, 99]);
+export const MEANINGS = { /* ... (same as before) ... */ 
+    1: "Leadership, independence, pioneering spirit", 2: "Cooperation, partnerships, diplomacy",
+    3: "Creativity, communication, artistic expression", 4: "Stability, hard work, practical foundation",
+    5: "Freedom, adventure, dynamic change", 6: "Nurturing, responsibility, home and family",
+    7: "Spirituality, introspection, mystical wisdom", 8: "Material success, authority, business acumen",
+    9: "Universal love, humanitarian service, completion", 11: "Intuition, inspiration, spiritual messenger",
+    22: "Master builder, large-scale achievement", 33: "Master teacher, spiritual uplifment of humanity"
+};
+
+export function cleanName(name) { return name.replace(/[^A-Za-z]/g, '').toUpperCase(); }
+export function reduceToSingleDigit(number, allowMaster = true) { /* ... (same as before) ... */ 
+    if (allowMaster && MASTER_NUMBERS.has(number)) return number;
+    while (number > 9) {
+        number = String(number).split('').reduce((sum, digit) => sum + parseInt(digit), 0);
+        if (allowMaster && MASTER_NUMBERS.has(number)) break;
+    }
+    return number;
+}
+function calculateHarmonyScore(name, system, kabbalistic = false) { /* ... (same as before) ... */
+    if (!name) return 0.0;
+    const values = name.split('').map(char => system[char] || 0);
+    const avgValue = values.reduce((sum, val) => sum + val, 0) / values.length;
+    const baseScore = Math.min(avgValue / (kabbalistic ? 26 : 9), 1.0) * 5;
+    const uniqueValues = new Set(values).size;
+    const balanceBonus = Math.min(uniqueValues / values.length, 0.5) * 2;
+    let flowScore = 0;
+    if (values.length > 1) {
+        const transitions = [];
+        for (let i = 1; i < values.length; i++) { transitions.push(Math.abs(values[i] - values[i - 1])); }
+        const avgTransition = transitions.reduce((sum, val) => sum + val, 0) / transitions.length;
+        const maxPossible = kabbalistic ? 25 : 8;
+        flowScore = Math.max(0, (maxPossible - avgTransition) / maxPossible) * 3;
+    }
+    const totalScore = baseScore + balanceBonus + flowScore;
+    return Math.min(totalScore, 10.0);
+}
+export function calculatePythagorean(name) { /* ... (same as before) ... */ 
+    const cleanedName = cleanName(name);
+    const total = cleanedName.split('').reduce((sum, char) => sum + (PYTHAGOREAN[char] || 0), 0);
+    const destiny = reduceToSingleDigit(total);
+    const harmonyScore = calculateHarmonyScore(cleanedName, PYTHAGOREAN);
+    return { expression: total, destiny: destiny, meaning: MEANINGS[destiny] || "Unique energy pattern", harmonyScore: parseFloat(harmonyScore.toFixed(1)) };
+}
+export function calculateChaldean(name) { /* ... (same as before) ... */ 
+    const cleanedName = cleanName(name);
+    const total = cleanedName.split('').reduce((sum, char) => sum + (CHALDEAN[char] || 0), 0);
+    const destiny = reduceToSingleDigit(total);
+    const harmonyScore = calculateHarmonyScore(cleanedName, CHALDEAN);
+    return { expression: total, destiny: destiny, meaning: MEANINGS[destiny] || "Unique energy pattern", harmonyScore: parseFloat(harmonyScore.toFixed(1)) };
+}
+export function calculateKabbalistic(name) { /* ... (same as before) ... */ 
+    const cleanedName = cleanName(name);
+    const total = cleanedName.split('').reduce((sum, char) => sum + (KABBALISTIC[char] || 0), 0);
+    const destiny = reduceToSingleDigit(total);
+    const harmonyScore = calculateHarmonyScore(cleanedName, KABBALISTIC, true);
+    return { expression: total, destiny: destiny, meaning: MEANINGS[destiny] || "Unique energy pattern", harmonyScore: parseFloat(harmonyScore.toFixed(1)) };
+}
+export function calculateLifePath(birthDateStr) { /* ... (same as before) ... */ 
+    try {
+        const [year, month, day] = birthDateStr.split('-').map(Number);
+        return lifePathFromParts(year, month, day);
+    } catch (e) { return 1; }
+}
+function lifePathFromParts(year, month, day) {
+    const dayReduced = reduceToSingleDigit(day);
+    const monthReduced = reduceToSingleDigit(month);
+    const yearReduced = reduceToSingleDigit(year);
+    const total = dayReduced + monthReduced + yearReduced;
+    return reduceToSingleDigit(total);
+}
+export function calculateFounderNumerology(name, birthdateStr) { /* ... (same as before) ... */ 
+    const lifePath = calculateLifePath(birthdateStr);
+    return { pythagorean: { ...calculatePythagorean(name), lifePathNumber: lifePath }, chaldean: { ...calculateChaldean(name), lifePathNumber: reduceToSingleDigit(lifePath) }, kabbalistic: { ...calculateKabbalistic(name), lifePathNumber: lifePath } };
+}
+function compatibilityFromDestinies(businessDestiny, founderDestiny) {
+    let compatibility;
+    const difference = Math.abs(businessDestiny - founderDestiny);
+    if (difference === 0) compatibility = 100;
+    else if (difference <= 2) compatibility = 90 - (difference * 5);
+    else if (difference <= 4) compatibility = 80 - (difference * 3);
+    else compatibility = 70 - (difference * 2);
+    const complementaryPairs = [[1, 8], [2, 7], [3, 6], [4, 5]];
+    for (const pair of complementaryPairs) { if ((businessDestiny === pair[0] && founderDestiny === pair[1]) || (businessDestiny === pair[1] && founderDestiny === pair[0])) { compatibility += 10; } }
+    return Math.min(compatibility, 100);
+}
+
+// --- Batch Numerology Engine ---
+// Scores many names in one pass per name: letter values come from typed-array tables indexed by
+// letter (A=0 .. Z=25), and all three systems plus their harmony scores are accumulated together.
+// Results are bit-for-bit identical to calculatePythagorean / calculateChaldean / calculateKabbalistic.
+const SYSTEM_COUNT = 3;
+const SYSTEM_KEYS = ['pythagorean', 'chaldean', 'kabbalistic'];
+const SYSTEM_MAX_VALUE = [9, 9, 26];
+const SYSTEM_MAX_TRANSITION = [8, 8, 25];
+
+function buildLetterTable(system) {
+    const table = new Uint8Array(26);
+    for (let i = 0; i < 26; i++) table[i] = system[String.fromCharCode(65 + i)] || 0;
+    return table;
+}
+const LETTER_TABLES = [buildLetterTable(PYTHAGOREAN), buildLetterTable(CHALDEAN), buildLetterTable(KABBALISTIC)];
+
+// Maps a UTF-16 code unit to its letter index, or 255 for characters cleanName would strip.
+const LETTER_INDEX = new Uint8Array(128).fill(255);
+for (let i = 0; i < 26; i++) { LETTER_INDEX[65 + i] = i; LETTER_INDEX[97 + i] = i; }
+
+function popCount(mask) {
+    let count = 0;
+    while (mask) { mask &= mask - 1; count++; }
+    return count;
+}
+
+function roundHarmony(score) { return parseFloat(score.toFixed(1)); }
+
+export function scoreNamesBatch(names) {
+    const count = names.length;
+    const expression = new Int32Array(count * SYSTEM_COUNT);
+    const destiny = new Int32Array(count * SYSTEM_COUNT);
+    const harmony = new Float64Array(count * SYSTEM_COUNT);
+    const overallHarmony = new Float64Array(count);
+    const letterCount = new Int32Array(count);
+    const totals = new Int32Array(SYSTEM_COUNT);
+    const transitionTotals = new Int32Array(SYSTEM_COUNT);
+    const previous = new Int32Array(SYSTEM_COUNT);
+    const seenMasks = new Uint32Array(SYSTEM_COUNT);
+
+    for (let n = 0; n < count; n++) {
+        const name = String(names[n] ?? '');
+        totals.fill(0); transitionTotals.fill(0); seenMasks.fill(0);
+        let length = 0;
+        for (let c = 0; c < name.length; c++) {
+            const code = name.charCodeAt(c);
+            const letter = code < 128 ? LETTER_INDEX[code] : 255;
+            if (letter === 255) continue;
+            for (let s = 0; s < SYSTEM_COUNT; s++) {
+                const value = LETTER_TABLES[s][letter];
+                totals[s] += value;
+                if (length > 0) transitionTotals[s] += Math.abs(value - previous[s]);
+                previous[s] = value;
+                seenMasks[s] |= 1 << value;
+            }
+            length++;
+        }
+        letterCount[n] = length;
+
+        let harmonySum = 0;
+        for (let s = 0; s < SYSTEM_COUNT; s++) {
+            const slot = n * SYSTEM_COUNT + s;
+            expression[slot] = totals[s];
+            destiny[slot] = reduceToSingleDigit(totals[s]);
+            let score = 0.0;
+            if (length > 0) {
+                const baseScore = Math.min((totals[s] / length) / SYSTEM_MAX_VALUE[s], 1.0) * 5;
+                const balanceBonus = Math.min(popCount(seenMasks[s]) / length, 0.5) * 2;
+                let flowScore = 0;
+                if (length > 1) {
+                    const maxPossible = SYSTEM_MAX_TRANSITION[s];
+                    flowScore = Math.max(0, (maxPossible - transitionTotals[s] / (length - 1)) / maxPossible) * 3;
+                }
+                score = Math.min(baseScore + balanceBonus + flowScore, 10.0);
+            }
+            harmony[slot] = roundHarmony(score);
+            harmonySum += harmony[slot];
+        }
+        overallHarmony[n] = roundHarmony(harmonySum / SYSTEM_COUNT);
+    }
+    return { names, count, expression, destiny, harmony, overallHarmony, letterCount };
+}
+
+// Materializes the per-name numerology block in the shape analyzeSingleName returns.
+export function getBatchNumerology(batch, index) {
+    const result = {};
+    for (let s = 0; s < SYSTEM_COUNT; s++) {
+        const slot = index * SYSTEM_COUNT + s;
+        const destiny = batch.destiny[slot];
+        result[SYSTEM_KEYS[s]] = {
+            expression: batch.expression[slot], destiny: destiny,
+            meaning: MEANINGS[destiny] || "Unique energy pattern", harmonyScore: batch.harmony[slot]
+        };
+    }
+    result.overallHarmony = batch.overallHarmony[index];
+    return result;
+}
+// --- End Batch Numerology Engine ---
+
+// --- Launch Date Calendar Index ---
+// Date numerology and weekday for every day from today up to CALENDAR_HORIZON_DAYS ahead, built once per
+// isolate. It is rebuilt from the current day only when a window ends past its last day; days that have
+// since passed stay in it and just never fall inside a window. Days are UTC day numbers, matching the UTC
+// clock edge functions run on. Days are grouped by numerology value, so a window query touches each
+// distinct value once instead of walking every day.
+export const DEFAULT_LAUNCH_WINDOW = { startDays: 30, endDays: 90, topN: 3 };
+export const CALENDAR_HORIZON_DAYS = 5 * 366;
+const MS_PER_DAY = 24 * 60 * 60 * 1000;
+const WEEKDAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
+const MIN_LAUNCH_COMPATIBILITY = 85;
+const ENERGY_TYPES = { 1: "Leadership & New Beginnings", /* ... */ };
+const PLANETARY_INFLUENCES = { 1: "Sun - Leadership & Vitality", /* ... */ };
+
+let calendarIndex = null;
+
+function buildCalendarIndex(firstDay, dayCount) {
+    const dates = new Array(dayCount);
+    const daysByValue = new Map();
+    for (let offset = 0; offset < dayCount; offset++) {
+        const date = new Date((firstDay + offset) * MS_PER_DAY);
+        const value = lifePathFromParts(date.getUTCFullYear(), date.getUTCMonth() + 1, date.getUTCDate());
+        dates[offset] = date.toISOString().slice(0, 10);
+        if (!daysByValue.has(value)) daysByValue.set(value, []);
+        daysByValue.get(value).push(offset);
+    }
+    const offsetsByValue = new Map();
+    daysByValue.forEach((offsets, value) => offsetsByValue.set(value, Int32Array.from(offsets)));
+    return { firstDay, dayCount, dates, offsetsByValue };
+}
+
+function getCalendarIndex(today, lastDayNeeded) {
+    if (!calendarIndex || calendarIndex.firstDay > today || calendarIndex.firstDay + calendarIndex.dayCount <= lastDayNeeded) {
+        const dayCount = Math.max(lastDayNeeded, today + CALENDAR_HORIZON_DAYS) - today + 1;
+        calendarIndex = buildCalendarIndex(today, dayCount);
+    }
+    return calendarIndex;
+}
+
+// First position in a sorted Int32Array whose value is >= target
+function lowerBound(sorted, target) {
+    let low = 0, high = sorted.length;
+    while (low < high) {
+        const mid = (low + high) >>> 1;
+        if (sorted[mid] < target) low = mid + 1; else high = mid;
+    }
+    return low;
+}
+
+// Top launch dates for each business name within [startDays, endDays] days from today.
+// Returns { [businessName]: dates[] }, ordered by compatibility, earliest first among ties.
+export function findOptimalDates(businessNames, founderBirthdateStr, window = {}) {
+    const { startDays, endDays, topN } = { ...DEFAULT_LAUNCH_WINDOW, ...window };
+    const founderLifePath = calculateLifePath(founderBirthdateStr);
+    const today = Math.floor(Date.now() / MS_PER_DAY);
+    const index = getCalendarIndex(today, today + endDays);
+    const startOffset = today + startDays - index.firstDay;
+    const endOffset = today + endDays - index.firstDay;
+
+    // The first topN days of each numerology value in the window; every name ranks within these
+    const windowDays = [];
+    index.offsetsByValue.forEach((offsets, value) => {
+        for (let i = lowerBound(offsets, startOffset), taken = 0; i < offsets.length && offsets[i] <= endOffset && taken < topN; i++, taken++) {
+            windowDays.push({ offset: offsets[i], value });
+        }
+    });
+
+    const destinies = scoreNamesBatch(businessNames);
+    const results = {};
+    businessNames.forEach((businessName, n) => {
+        const businessNumDestiny = destinies.destiny[n * SYSTEM_COUNT];
+        const ranked = [];
+        windowDays.forEach(({ offset, value }) => {
+            const businessCompat = 100 - Math.abs(businessNumDestiny - value) * 10;
+            const founderCompat = 100 - Math.abs(founderLifePath - value) * 10;
+            const overallCompat = (businessCompat + founderCompat) / 2;
+            if (overallCompat >= MIN_LAUNCH_COMPATIBILITY) ranked.push({ offset, value, compatibility: Math.floor(overallCompat) });
+        });
+        ranked.sort((a, b) => (b.compatibility - a.compatibility) || (a.offset - b.offset));
+        results[businessName] = ranked.slice(0, topN).map(({ offset, value, compatibility }) => ({
+            date: index.dates[offset], numerologyValue: value, compatibility,
+            energyType: ENERGY_TYPES[value] || "Unique Energy",
+            description: `Excellent alignment...`, // Simplified
+            dayOfWeek: WEEKDAYS[(index.firstDay + offset + 4) % 7], // 1970-01-01 (day 0) was a Thursday
+            planetaryInfluence: PLANETARY_INFLUENCES[value] || "Universal Energy"
+        }));
+    });
+    return results;
+}
+// --- End Launch Date Calendar Index ---
+
+// --- Founder Profiles & Team Compatibility ---
+// Founder profiles only depend on (name, birthdate), so they are computed once and reused across names,
+// requests and team members. Returned profiles are shared: treat them as read-only.
+const founderProfiles = createTtlCache({ maxEntries: 1000, ttlMs: 24 * 60 * 60 * 1000 });
+
+export function getFounderProfile(name, birthdateStr) {
+    const key = `${name}\u0000${birthdateStr}`;
+    let profile = founderProfiles.get(key);
+    if (profile === undefined) {
+        profile = calculateFounderNumerology(name, birthdateStr);
+        founderProfiles.set(key, profile);
+    }
+    return profile;
+}
+
+// Compatibility for every (business destiny, founder destiny) pair a destiny number can take
+const DESTINY_RANGE = 100;
+const COMPATIBILITY_TABLE = new Int16Array(DESTINY_RANGE * DESTINY_RANGE);
+for (let business = 0; business < DESTINY_RANGE; business++) {
+    for (let founder = 0; founder < DESTINY_RANGE; founder++) {
+        COMPATIBILITY_TABLE[business * DESTINY_RANGE + founder] = compatibilityFromDestinies(business, founder);
+    }
+}
+
+function lookupCompatibility(businessDestiny, founderDestiny) {
+    if (businessDestiny >= 0 && businessDestiny < DESTINY_RANGE && founderDestiny >= 0 && founderDestiny < DESTINY_RANGE) {
+        return COMPATIBILITY_TABLE[businessDestiny * DESTINY_RANGE + founderDestiny];
+    }
+    return compatibilityFromDestinies(businessDestiny, founderDestiny);
+}
+
+// founders: [{ name, birthdate }]. Scores every founder against every business name in one pass and
+// aggregates per-name team scores (average, weakest and strongest founder match).
+export function buildCompatibilityMatrix(founders, businessNames) {
+    const nameBatch = scoreNamesBatch(businessNames);
+    const founderDestinies = Int32Array.from(founders, founder => getFounderProfile(founder.name, founder.birthdate).pythagorean.destiny);
+    const matrix = new Int16Array(founders.length * businessNames.length);
+    for (let f = 0; f < founders.length; f++) {
+        for (let n = 0; n < businessNames.length; n++) {
+            matrix[f * businessNames.length + n] = lookupCompatibility(nameBatch.destiny[n * SYSTEM_COUNT], founderDestinies[f]);
+        }
+    }
+
+    const teamScores = businessNames.map((businessName, n) => {
+        let total = 0, min = Infinity, max = -Infinity;
+        for (let f = 0; f < founders.length; f++) {
+            const score = matrix[f * businessNames.length + n];
+            total += score;
+            min = Math.min(min, score);
+            max = Math.max(max, score);
+        }
+        return { name: businessName, average: parseFloat((total / founders.length).toFixed(1)), min, max };
+    });
+
+    return {
+        compatibility: founders.map((_, f) => Array.from(matrix.subarray(f * businessNames.length, (f + 1) * businessNames.length))),
+        teamScores
+    };
+}
+// --- End Founder Profiles & Team Compatibility ---
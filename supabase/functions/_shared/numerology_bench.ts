@@ -0,0 +1,60 @@
+// @ts-check
+// Benchmark: batch numerology engine vs. the per-system calculators
+// Run with: deno bench supabase/functions/_shared/numerology_bench.ts
+
+import {
+    calculatePythagorean, calculateChaldean, calculateKabbalistic,
+    scoreNamesBatch, getBatchNumerology
+} from "./numerology.ts";
+
+const WORDS = ['Vital', 'Core', 'Solutions', 'Nova', 'Quantum', 'Zen', 'Bright', 'Path', 'Labs', 'Apex',
+    'Harbor', 'Lumen', 'Forge', 'Kinetic', 'Sage', 'Orbit', 'Pixel', 'Verde', 'Summit', 'Echo'];
+const EDGE_CASES = ['', '123', 'A', 'AA', 'x-y_z', "O'Brien & Co.", 'Café Société', 'ÆON 2.0', '  spaced   out  '];
+
+function buildCandidates(count) {
+    const names = [...EDGE_CASES];
+    let seed = 42;
+    const next = () => (seed = (seed * 1103515245 + 12345) % 2147483648) / 2147483648;
+    while (names.length < count) {
+        const parts = 1 + Math.floor(next() * 3);
+        const words = [];
+        for (let i = 0; i < parts; i++) words.push(WORDS[Math.floor(next() * WORDS.length)]);
+        names.push(words.join(next() < 0.5 ? ' ' : ''));
+    }
+    return names;
+}
+
+// Same computation analyzeSingleName performed before the batch engine existed
+function legacyNumerology(name) {
+    const pythagorean = calculatePythagorean(name);
+    const chaldean = calculateChaldean(name);
+    const kabbalistic = calculateKabbalistic(name);
+    const overallHarmony = parseFloat(((pythagorean.harmonyScore + chaldean.harmonyScore + kabbalistic.harmonyScore) / 3).toFixed(1));
+    return { pythagorean, chaldean, kabbalistic, overallHarmony };
+}
+
+const CANDIDATES = buildCandidates(10000);
+
+// Refuse to report numbers for an engine that disagrees with the reference output
+const batch = scoreNamesBatch(CANDIDATES);
+CANDIDATES.forEach((name, i) => {
+    const expected = JSON.stringify(legacyNumerology(name));
+    const actual = JSON.stringify(getBatchNumerology(batch, i));
+    if (expected !== actual) {
+        throw new Error(`Batch numerology mismatch for "${name}": expected ${expected}, got ${actual}`);
+    }
+});
+console.log(`Batch numerology output matches the per-system calculators for ${CANDIDATES.length} names`);
+
+Deno.bench({ name: "per-system calculators, 10k names", group: "numerology", baseline: true }, () => {
+    for (const name of CANDIDATES) legacyNumerology(name);
+});
+
+Deno.bench({ name: "scoreNamesBatch, 10k names", group: "numerology" }, () => {
+    scoreNamesBatch(CANDIDATES);
+});
+
+Deno.bench({ name: "scoreNamesBatch + getBatchNumerology, 10k names", group: "numerology" }, () => {
+    const result = scoreNamesBatch(CANDIDATES);
+    for (let i = 0; i < result.count; i++) getBatchNumerology(result, i);
+});
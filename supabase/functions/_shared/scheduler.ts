@@ -0,0 +1,178 @@
+// @ts-check
+// Shared module: outbound request scheduler
+// Every upstream fetch goes through scheduledFetch, which applies per-host concurrency limits and
+// token-bucket rate limiting, and retries throttled or failed calls with Retry-After-aware backoff.
+// Deno's fetch keeps connections alive per origin; response bodies of retried calls are cancelled so
+// their connections go back to the pool instead of lingering. init.signal cancels the call at any
+// point: while queued, in flight, or waiting to retry. init.deadlineAt (epoch ms) is the time the
+// caller gives up: a retry whose Retry-After or backoff would end past it is not attempted, and the
+// last response (or error) is returned straight away instead.
+
+import { recordLatency } from "./metrics.ts";
+
+const DEFAULT_HOST_LIMITS = { concurrency: 4, ratePerSecond: 10, burst: 10, maxRetries: 2 };
+const RETRYABLE_STATUSES = new Set([429, 502, 503, 504]);
+const BASE_BACKOFF_MS = 250;
+const MAX_BACKOFF_MS = 5000;
+
+const hosts = new Map();
+
+function getHostState(host) {
+    let state = hosts.get(host);
+    if (!state) {
+        state = {
+            limits: { ...DEFAULT_HOST_LIMITS },
+            active: 0,
+            queue: [],
+            tokens: DEFAULT_HOST_LIMITS.burst,
+            lastRefill: Date.now(),
+            pausedUntil: 0,
+            timer: null,
+            stats: { requests: 0, retries: 0, throttled: 0, networkErrors: 0, deadlineSkips: 0, maxQueued: 0 }
+        };
+        hosts.set(host, state);
+    }
+    return state;
+}
+
+export function configureUpstreamHost(host, limits) {
+    const state = getHostState(host);
+    state.limits = { ...state.limits, ...limits };
+    state.tokens = Math.min(state.tokens, state.limits.burst);
+}
+
+function refillTokens(state, now) {
+    const elapsedSeconds = (now - state.lastRefill) / 1000;
+    state.tokens = Math.min(state.limits.burst, state.tokens + elapsedSeconds * state.limits.ratePerSecond);
+    state.lastRefill = now;
+}
+
+function schedulePump(state, delayMs) {
+    if (state.timer !== null) return;
+    state.timer = setTimeout(() => {
+        state.timer = null;
+        pump(state);
+    }, Math.max(1, Math.ceil(delayMs)));
+}
+
+function pump(state) {
+    while (state.queue.length > 0 && state.active < state.limits.concurrency) {
+        const now = Date.now();
+        if (state.pausedUntil > now) return schedulePump(state, state.pausedUntil - now);
+        refillTokens(state, now);
+        if (state.tokens < 1) return schedulePump(state, (1 - state.tokens) / state.limits.ratePerSecond * 1000);
+        state.tokens -= 1;
+        state.active++;
+        state.queue.shift()();
+    }
+}
+
+// Waiting in the queue counts against the caller's deadline: an aborted signal drops the waiter.
+function acquireSlot(state, signal) {
+    return new Promise((resolve, reject) => {
+        if (signal?.aborted) return reject(signal.reason);
+        const onAbort = () => {
+            const position = state.queue.indexOf(grant);
+            if (position !== -1) state.queue.splice(position, 1);
+            reject(signal.reason);
+        };
+        const grant = () => {
+            signal?.removeEventListener('abort', onAbort);
+            resolve();
+        };
+        signal?.addEventListener('abort', onAbort, { once: true });
+        state.queue.push(grant);
+        state.stats.maxQueued = Math.max(state.stats.maxQueued, state.queue.length);
+        pump(state);
+    });
+}
+
+function releaseSlot(state) {
+    state.active--;
+    pump(state);
+}
+
+// Retry-After is either delay-seconds or an HTTP date.
+function parseRetryAfterMs(response) {
+    const header = response.headers.get('retry-after');
+    if (!header) return null;
+    const seconds = Number(header);
+    if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+    const date = Date.parse(header);
+    return Number.isNaN(date) ? null : Math.max(0, date - Date.now());
+}
+
+function backoffMs(attempt) {
+    const exponential = BASE_BACKOFF_MS * 2 ** attempt;
+    return Math.min(MAX_BACKOFF_MS, exponential / 2 + Math.random() * exponential / 2);
+}
+
+function sleep(ms, signal) {
+    return new Promise((resolve, reject) => {
+        if (signal?.aborted) return reject(signal.reason);
+        const timer = setTimeout(() => {
+            signal?.removeEventListener('abort', onAbort);
+            resolve();
+        }, ms);
+        const onAbort = () => {
+            clearTimeout(timer);
+            reject(signal.reason);
+        };
+        signal?.addEventListener('abort', onAbort, { once: true });
+    });
+}
+
+function retryFitsDeadline(deadlineAt, delayMs) {
+    return deadlineAt === undefined || Date.now() + delayMs < deadlineAt;
+}
+
+export async function scheduledFetch(url, init = {}) {
+    const host = new URL(url).host;
+    const state = getHostState(host);
+    const { deadlineAt, ...fetchInit } = init;
+    for (let attempt = 0; ; attempt++) {
+        await acquireSlot(state, init.signal);
+        state.stats.requests++;
+        const start = performance.now();
+        let response;
+        try {
+            response = await fetch(url, fetchInit);
+            recordLatency('upstream', host, performance.now() - start);
+        } catch (e) {
+            recordLatency('upstream', host, performance.now() - start);
+            releaseSlot(state);
+            state.stats.networkErrors++;
+            const delayMs = backoffMs(attempt);
+            if (attempt >= state.limits.maxRetries || init.signal?.aborted || !retryFitsDeadline(deadlineAt, delayMs)) throw e;
+            state.stats.retries++;
+            await sleep(delayMs, init.signal);
+            continue;
+        }
+        // Retry-After is honoured in full; only our own exponential backoff is capped
+        const delayMs = parseRetryAfterMs(response) ?? backoffMs(attempt);
+        if (response.status === 429) {
+            // Hold back every queued call to this host, not just the one that was throttled. The pause
+            // is set before the slot is released so the next queued call cannot slip out first.
+            state.stats.throttled++;
+            state.pausedUntil = Math.max(state.pausedUntil, Date.now() + delayMs);
+        }
+        releaseSlot(state);
+
+        if (!RETRYABLE_STATUSES.has(response.status) || attempt >= state.limits.maxRetries) return response;
+        if (!retryFitsDeadline(deadlineAt, delayMs)) {
+            state.stats.deadlineSkips++;
+            return response;
+        }
+        await response.body?.cancel();
+        state.stats.retries++;
+        await sleep(delayMs, init.signal);
+    }
+}
+
+export function getSchedulerStats() {
+    const stats = {};
+    hosts.forEach((state, host) => {
+        stats[host] = { ...state.stats, active: state.active, queued: state.queue.length, limits: state.limits };
+    });
+    return stats;
+}
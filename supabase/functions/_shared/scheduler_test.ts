@@ -0,0 +1,112 @@
+// @ts-check
+// Tests: outbound request scheduler
+// Run with: deno test supabase/functions/_shared/scheduler_test.ts
+// Each test uses its own host so per-host state (tokens, pauses, queues) does not leak between them.
+
+import { assert, assertEquals, assertRejects } from "https://deno.land/std@0.224.0/assert/mod.ts";
+import { configureUpstreamHost, scheduledFetch, getSchedulerStats } from "./scheduler.ts";
+
+// Replaces fetch for the duration of fn; respond(callIndex, init) returns the Response (or a promise)
+async function withFetch(respond, fn) {
+    const originalFetch = globalThis.fetch;
+    const calls = [];
+    globalThis.fetch = (url, init = {}) => {
+        calls.push({ url: String(url), at: Date.now() });
+        return Promise.resolve(respond(calls.length - 1, init));
+    };
+    try {
+        await fn(calls);
+    } finally {
+        globalThis.fetch = originalFetch;
+    }
+}
+
+function hostUrl(host) {
+    return `https://${host}/resource`;
+}
+
+Deno.test("token bucket spaces calls beyond the burst at the configured rate", async () => {
+    const host = "bucket.test";
+    configureUpstreamHost(host, { concurrency: 10, ratePerSecond: 20, burst: 2, maxRetries: 0 });
+    await withFetch(() => new Response("ok"), async (calls) => {
+        const started = Date.now();
+        await Promise.all([0, 1, 2, 3].map(() => scheduledFetch(hostUrl(host)).then(r => r.text())));
+        assertEquals(calls.length, 4);
+        // Two calls ride the burst; the next two wait ~50ms each for a token
+        assert(calls[1].at - started < 40, "burst calls should start immediately");
+        assert(calls[3].at - started >= 80, `fourth call started after ${calls[3].at - started}ms`);
+    });
+});
+
+Deno.test("a 429 pauses every queued call to the host for Retry-After", async () => {
+    const host = "pause.test";
+    configureUpstreamHost(host, { concurrency: 1, ratePerSecond: 1000, burst: 1000, maxRetries: 1 });
+    await withFetch((i) => i === 0
+        ? new Response("slow down", { status: 429, headers: { "Retry-After": "0.2" } })
+        : new Response("ok"), async (calls) => {
+        const responses = await Promise.all([scheduledFetch(hostUrl(host)), scheduledFetch(hostUrl(host))]);
+        assertEquals(responses.map(r => r.status), [200, 200]);
+        await Promise.all(responses.map(r => r.text()));
+        assertEquals(calls.length, 3);
+        // The second caller never got the throttled slot, yet it still waited out the pause
+        assert(calls[1].at - calls[0].at >= 190, `next call after ${calls[1].at - calls[0].at}ms`);
+        assertEquals(getSchedulerStats()[host].throttled, 1);
+    });
+});
+
+Deno.test("Retry-After is honoured beyond the backoff cap", async () => {
+    const host = "retry-after.test";
+    configureUpstreamHost(host, { concurrency: 1, ratePerSecond: 1000, burst: 1000, maxRetries: 1 });
+    await withFetch((i) => i === 0
+        ? new Response("busy", { status: 503, headers: { "Retry-After": "0.3" } })
+        : new Response("ok"), async (calls) => {
+        const response = await scheduledFetch(hostUrl(host));
+        await response.text();
+        assertEquals(response.status, 200);
+        assert(calls[1].at - calls[0].at >= 290, `retried after ${calls[1].at - calls[0].at}ms`);
+    });
+});
+
+Deno.test("a Retry-After past the caller's deadline returns the throttled response at once", async () => {
+    const host = "deadline.test";
+    configureUpstreamHost(host, { concurrency: 1, ratePerSecond: 1000, burst: 1000, maxRetries: 2 });
+    await withFetch(() => new Response("slow down", { status: 429, headers: { "Retry-After": "60" } }), async (calls) => {
+        const started = Date.now();
+        const response = await scheduledFetch(hostUrl(host), { deadlineAt: Date.now() + 500 });
+        await response.text();
+        assertEquals(response.status, 429);
+        assertEquals(calls.length, 1);
+        assert(Date.now() - started < 100, "should not wait for a retry that cannot finish in time");
+        assertEquals(getSchedulerStats()[host].deadlineSkips, 1);
+    });
+});
+
+Deno.test("aborting a queued call removes it without ever fetching", async () => {
+    const host = "queued-abort.test";
+    configureUpstreamHost(host, { concurrency: 1, ratePerSecond: 1000, burst: 1000, maxRetries: 0 });
+    let release;
+    const blocker = new Promise(resolve => { release = resolve; });
+    await withFetch((i) => i === 0 ? blocker.then(() => new Response("ok")) : new Response("ok"), async (calls) => {
+        const first = scheduledFetch(hostUrl(host));
+        const controller = new AbortController();
+        const queued = scheduledFetch(hostUrl(host), { signal: controller.signal });
+        assertEquals(getSchedulerStats()[host].queued, 1);
+        controller.abort();
+        await assertRejects(() => queued);
+        assertEquals(getSchedulerStats()[host].queued, 0);
+        release();
+        await (await first).text();
+        assertEquals(calls.length, 1);
+    });
+});
+
+Deno.test("aborting during backoff stops the retry", async () => {
+    const host = "backoff-abort.test";
+    configureUpstreamHost(host, { concurrency: 1, ratePerSecond: 1000, burst: 1000, maxRetries: 2 });
+    await withFetch(() => new Response("busy", { status: 503, headers: { "Retry-After": "5" } }), async (calls) => {
+        const started = Date.now();
+        await assertRejects(() => scheduledFetch(hostUrl(host), { signal: AbortSignal.timeout(50) }));
+        assert(Date.now() - started < 1000, "abort should cut the 5s wait short");
+        assertEquals(calls.length, 1);
+    });
+});
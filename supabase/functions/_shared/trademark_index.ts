@@ -0,0 +1,198 @@
+// @ts-check
+// Shared module: local trademark similarity index
+// Built once per isolate from a bulk marks file (TRADEMARK_INDEX_PATH), one mark per line as
+//   mark[<TAB>status[<TAB>serial number]]
+// where status is e.g. LIVE/DEAD/REGISTERED/ABANDONED; '#' lines are skipped. Marks are indexed by
+// character trigrams of their letters and digits, so "Vital Core" and "VitalCore" share postings.
+// Posting lists are stored as Uint32Arrays and a query only scores the marks sharing enough
+// trigrams with it, ranking them with a normalized edit distance that, unlike a character-set
+// overlap, does not rate anagrams as identical.
+
+const GRAM_SIZE = 3;
+const STATUS_UNKNOWN = 0;
+const STATUS_LIVE = 1;
+const STATUS_DEAD = 2;
+const DEAD_STATUSES = ['dead', 'abandon', 'cancel', 'expire'];
+
+let indexPromise = null;
+const indexStats = { path: null, loaded: false, marks: 0, grams: 0, loadMs: 0, queries: 0, error: null };
+
+export function normalizeMarkKey(text) {
+    return String(text).toLowerCase().replace(/[^a-z0-9]/g, '');
+}
+
+function parseStatus(status) {
+    const value = (status ?? '').trim().toLowerCase();
+    if (!value) return STATUS_UNKNOWN;
+    return DEAD_STATUSES.some(prefix => value.includes(prefix)) ? STATUS_DEAD : STATUS_LIVE;
+}
+
+function forEachGram(key, fn) {
+    const padded = `^${key}$`;
+    for (let i = 0; i + GRAM_SIZE <= padded.length; i++) fn(padded.slice(i, i + GRAM_SIZE));
+}
+
+function uniqueGrams(key) {
+    const grams = new Set();
+    forEachGram(key, gram => grams.add(gram));
+    return grams;
+}
+
+// Levenshtein distance with two reused rows
+function editDistance(a, b) {
+    if (a === b) return 0;
+    if (a.length === 0) return b.length;
+    if (b.length === 0) return a.length;
+    let previous = new Uint16Array(b.length + 1);
+    let current = new Uint16Array(b.length + 1);
+    for (let j = 0; j <= b.length; j++) previous[j] = j;
+    for (let i = 1; i <= a.length; i++) {
+        current[0] = i;
+        const ca = a.charCodeAt(i - 1);
+        for (let j = 1; j <= b.length; j++) {
+            const cost = ca === b.charCodeAt(j - 1) ? 0 : 1;
+            current[j] = Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost);
+        }
+        [previous, current] = [current, previous];
+    }
+    return previous[b.length];
+}
+
+// Order-aware similarity in [0, 1]: 1 - edit distance / longer length, on normalized keys
+export function markSimilarity(term1, term2) {
+    const a = normalizeMarkKey(term1);
+    const b = normalizeMarkKey(term2);
+    const longest = Math.max(a.length, b.length);
+    return longest === 0 ? 0 : 1 - editDistance(a, b) / longest;
+}
+
+export function buildTrademarkIndex(text) {
+    const marks = [];
+    const statuses = [];
+    const serials = [];
+    const gramCounts = [];
+    const postings = new Map();
+    for (const line of text.split('\n')) {
+        if (!line.trim() || line.startsWith('#')) continue;
+        const [mark, status, serial] = line.split('\t');
+        const key = normalizeMarkKey(mark);
+        if (!key) continue;
+        const id = marks.length;
+        marks.push(mark.trim());
+        statuses.push(parseStatus(status));
+        serials.push(serial?.trim() || null);
+        const grams = uniqueGrams(key);
+        gramCounts.push(grams.size);
+        grams.forEach(gram => {
+            const list = postings.get(gram);
+            if (list) list.push(id); else postings.set(gram, [id]);
+        });
+    }
+    const compactPostings = new Map();
+    postings.forEach((ids, gram) => compactPostings.set(gram, Uint32Array.from(ids)));
+    // Bulk files list the same mark text many times; an exact lookup must see a live (or unknown)
+    // row whenever there is one, not whichever row came first
+    const exactIds = new Map();
+    marks.forEach((mark, id) => {
+        const key = normalizeMarkKey(mark);
+        const known = exactIds.get(key);
+        if (known === undefined || (statuses[known] === STATUS_DEAD && statuses[id] !== STATUS_DEAD)) exactIds.set(key, id);
+    });
+    return {
+        marks,
+        statuses: Uint8Array.from(statuses),
+        serials,
+        gramCounts: Uint16Array.from(gramCounts),
+        postings: compactPostings,
+        exactIds,
+        // Scratch counters reused by every query; only the touched slots are reset
+        sharedGrams: new Uint16Array(marks.length)
+    };
+}
+
+function describeMark(index, id, similarity) {
+    const status = index.statuses[id];
+    return {
+        mark: index.marks[id],
+        status: status === STATUS_LIVE ? 'live' : status === STATUS_DEAD ? 'dead' : 'unknown',
+        serialNumber: index.serials[id],
+        similarity: Math.round(similarity * 1000) / 1000
+    };
+}
+
+export function findExactMark(index, term) {
+    const id = index.exactIds.get(normalizeMarkKey(term));
+    return id === undefined ? null : describeMark(index, id, 1);
+}
+
+// Ranked near-matches for term, one per normalized mark text (a live row is preferred over an
+// unknown one, and both over a dead one). Candidates must share at least minDice of their trigrams
+// (Dice coefficient) before the edit distance is computed; dead marks are skipped unless includeDead.
+export function searchTrademarkIndex(index, term, { limit = 10, minSimilarity = 0.6, minDice = 0.3, includeDead = false } = {}) {
+    const key = normalizeMarkKey(term);
+    if (!key) return [];
+    indexStats.queries++;
+    const queryGrams = uniqueGrams(key);
+    const touched = [];
+    queryGrams.forEach(gram => {
+        const ids = index.postings.get(gram);
+        if (!ids) return;
+        for (let i = 0; i < ids.length; i++) {
+            const id = ids[i];
+            if (index.sharedGrams[id] === 0) touched.push(id);
+            index.sharedGrams[id]++;
+        }
+    });
+
+    const matches = [];
+    for (const id of touched) {
+        const shared = index.sharedGrams[id];
+        index.sharedGrams[id] = 0;
+        if (!includeDead && index.statuses[id] === STATUS_DEAD) continue;
+        if (2 * shared / (queryGrams.size + index.gramCounts[id]) < minDice) continue;
+        const candidate = normalizeMarkKey(index.marks[id]);
+        const longest = Math.max(key.length, candidate.length);
+        if (Math.abs(key.length - candidate.length) > (1 - minSimilarity) * longest) continue; // Edit distance >= length gap
+        const similarity = 1 - editDistance(key, candidate) / longest;
+        if (similarity >= minSimilarity) matches.push({ id, similarity });
+    }
+    const statusRank = id => index.statuses[id] === STATUS_LIVE ? 0 : index.statuses[id] === STATUS_UNKNOWN ? 1 : 2;
+    matches.sort((a, b) => (b.similarity - a.similarity) || (statusRank(a.id) - statusRank(b.id)) || (a.id - b.id));
+    const seenKeys = new Set();
+    const unique = matches.filter(match => {
+        const markKey = normalizeMarkKey(index.marks[match.id]);
+        if (seenKeys.has(markKey)) return false;
+        seenKeys.add(markKey);
+        return true;
+    });
+    return unique.slice(0, limit).map(match => describeMark(index, match.id, match.similarity));
+}
+
+// --- Isolate Index ---
+// Resolves to the index, or null when TRADEMARK_INDEX_PATH is unset or the file cannot be read;
+// the file is read and indexed at most once per isolate.
+export function loadTrademarkIndex() {
+    if (indexPromise) return indexPromise;
+    const path = Deno.env.get("TRADEMARK_INDEX_PATH");
+    indexStats.path = path ?? null;
+    if (!path) return (indexPromise = Promise.resolve(null));
+    indexPromise = (async () => {
+        const start = performance.now();
+        try {
+            const index = buildTrademarkIndex(await Deno.readTextFile(path));
+            Object.assign(indexStats, { loaded: true, marks: index.marks.length, grams: index.postings.size, loadMs: Math.round(performance.now() - start) });
+            console.log(`Trademark index loaded: ${index.marks.length} marks in ${indexStats.loadMs}ms`);
+            return index;
+        } catch (e) {
+            indexStats.error = e.message;
+            console.error(`Could not load trademark index from ${path}:`, e);
+            return null;
+        }
+    })();
+    return indexPromise;
+}
+
+export function getTrademarkIndexStats() {
+    return { ...indexStats };
+}
+// --- End Isolate Index ---
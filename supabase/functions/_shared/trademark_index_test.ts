@@ -0,0 +1,43 @@
+// @ts-check
+// Tests: local trademark similarity index
+// Run with: deno test supabase/functions/_shared/trademark_index_test.ts
+
+import { assert, assertEquals } from "https://deno.land/std@0.224.0/assert/mod.ts";
+import { buildTrademarkIndex, findExactMark, searchTrademarkIndex, markSimilarity } from "./trademark_index.ts";
+
+Deno.test("an exact lookup prefers a live row over an earlier dead row of the same mark", () => {
+    const index = buildTrademarkIndex("VITAL CORE\tDEAD\t100\nVITAL CORE\tLIVE\t200\nNOVA LABS\tDEAD\t300\n");
+    assertEquals(findExactMark(index, "Vital Core")?.status, "live");
+    assertEquals(findExactMark(index, "Vital Core")?.serialNumber, "200");
+    assertEquals(findExactMark(index, "vitalcore")?.status, "live");
+    assertEquals(findExactMark(index, "Nova Labs")?.status, "dead");
+    assertEquals(findExactMark(index, "Sun Peak"), null);
+});
+
+Deno.test("an unknown-status row also beats a dead one", () => {
+    const index = buildTrademarkIndex("VITAL CORE\tABANDONED\nVITAL CORE\n");
+    assertEquals(findExactMark(index, "Vital Core")?.status, "unknown");
+});
+
+Deno.test("dead marks are left out of near-matches unless asked for", () => {
+    const index = buildTrademarkIndex("VITAL CORES\tDEAD\nVITAL CORPS\tLIVE\n");
+    assertEquals(searchTrademarkIndex(index, "Vital Core").map(match => match.mark), ["VITAL CORPS"]);
+    assertEquals(searchTrademarkIndex(index, "Vital Core", { includeDead: true }).length, 2);
+});
+
+Deno.test("near-matches are ranked by similarity, one entry per mark text", () => {
+    const index = buildTrademarkIndex([
+        "VITAL CORPS\tDEAD", "VITAL CORPS\tLIVE\t1", "VITAL CORPS\tLIVE\t2",
+        "VITAL CORE\tLIVE", "VITAL CORE SYSTEMS\tLIVE", "OCRE LATIV\tLIVE"
+    ].join("\n"));
+    const matches = searchTrademarkIndex(index, "Vital Core", { minSimilarity: 0.5 });
+    assertEquals(matches.map(match => match.mark), ["VITAL CORE", "VITAL CORPS", "VITAL CORE SYSTEMS"]);
+    assertEquals(matches[1].serialNumber, "1");
+    for (let i = 1; i < matches.length; i++) assert(matches[i - 1].similarity >= matches[i].similarity);
+});
+
+Deno.test("similarity is order-aware and rates a one-word mark low against a two-word name", () => {
+    assertEquals(markSimilarity("Vital Core", "VITAL CORE"), 1);
+    assert(markSimilarity("Vital Core", "Ocre Lativ") < 0.5, "anagrams are not identical");
+    assert(markSimilarity("Vital Core", "Vital") <= 0.7, "a single shared word is not a high-similarity conflict");
+});
@@ -16,9 +16,26 @@ declare global {
       toObject(): Record<string, string>;
     };
 
+    export function memoryUsage(): {
+      rss: number;
+      heapTotal: number;
+      heapUsed: number;
+      external: number;
+    };
+
+    // Used by *_bench.ts files (run with `deno bench`)
+    export function bench(
+      options: { name: string; group?: string; baseline?: boolean },
+      fn: () => void | Promise<void>
+    ): void;
+
+    export const args: string[];
+    export function readTextFile(path: string | URL): Promise<string>;
+    export function readFile(path: string | URL): Promise<Uint8Array>;
+    export function writeFile(path: string | URL, data: Uint8Array): Promise<void>;
+
     // Add other commonly used Deno APIs if needed by your functions
     // For example, for file system access:
-    // export function readTextFile(path: string | URL): Promise<string>;
     // export function writeTextFile(path: string | URL, data: string, options?: WriteFileOptions): Promise<void>;
     // interface WriteFileOptions { append?: boolean; create?: boolean; mode?: number; }
 
@@ -26,6 +43,14 @@ declare global {
     // export const crypto: { subtle: SubtleCrypto; getRandomValues<T extends ArrayBufferView | null>(array: T): T; randomUUID(): string; };
   }
 
+  // Supabase Edge Runtime: keeps the isolate alive until promises passed to waitUntil settle
+  var EdgeRuntime: { waitUntil(promise: Promise<unknown>): void } | undefined;
+
+  // Deno sets import.meta.main for the entry module, e.g. build scripts run with `deno run`
+  interface ImportMeta {
+    main: boolean;
+  }
+
   // If your functions use `fetch`, `Request`, `Response`, `Headers`,
   // these are typically covered by DOM or lib.webworker.d.ts, 
   // but you can declare them if specific Deno extensions are used.
@@ -1,182 +1,191 @@
 // @ts-check
 // Supabase function: generate-names
 
+import {
+    getFounderProfile, buildCompatibilityMatrix, findOptimalDates,
+    scoreNamesBatch, getBatchNumerology, DEFAULT_LAUNCH_WINDOW, CALENDAR_HORIZON_DAYS, MEANINGS
+} from "../_shared/numerology.ts";
+import { createTtlCache, readIntEnv } from "../_shared/cache.ts";
+import { configureUpstreamHost, scheduledFetch, getSchedulerStats } from "../_shared/scheduler.ts";
+import { createStageTimer, getLatencySnapshot } from "../_shared/metrics.ts";
+import {
+    loadTrademarkIndex, searchTrademarkIndex, findExactMark, markSimilarity, normalizeMarkKey, getTrademarkIndexStats
+} from "../_shared/trademark_index.ts";
+import { loadDomainPrefilter, findRegisteredTlds, getDomainPrefilterStats } from "../_shared/domain_prefilter.ts";
+import { createEncodedResponse } from "../_shared/compression.ts";
+import { callRpc, isDatabaseConfigured, isUuid, runInBackground } from "../_shared/database.ts";
+import { recordGeneration, getAnalyticsSummary, getGenerationHistory, isAnalyticsEnabled } from "../_shared/analytics.ts";
+
 console.log("generate-names function cold start");
 
-// --- Numerology Logic (adapted from previous numerology.js) ---
-const PYTHAGOREAN = {
-    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8, 'I': 9,
-    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'O': 6, 'P': 7, 'Q': 8, 'R': 9,
-    'S': 1, 'T': 2, 'U': 3, 'V': 4, 'W': 5, 'X': 6, 'Y': 7, 'Z': 8
-};
-const CHALDEAN = { /* ... (same as before) ... */ 
-    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 8, 'G': 3, 'H': 5, 'I': 1,
-    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'O': 7, 'P': 8, 'Q': 1, 'R': 2,
-    'S': 3, 'T': 4, 'U': 6, 'V': 6, 'W': 6, 'X': 5, 'Y': 1, 'Z': 7
-};
-const KABBALISTIC = { /* ... (same as before) ... */ 
-    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8, 'I': 9,
-    'J': 10, 'K': 11, 'L': 12, 'M': 13, 'N': 14, 'O': 15, 'P': 16, 'Q': 17, 'R': 18,
-    'S': 19, 'T': 20, 'U': 21, 'V': 22, 'W': 23, 'X': 24, 'Y': 25, 'Z': 26
-};
-const MASTER_NUMBERS = new Set([11, 22, 33, 44, 55, 66, 77, 88, 99]);
-const MEANINGS = { /* ... (same as before) ... */ 
-    1: "Leadership, independence, pioneering spirit", 2: "Cooperation, partnerships, diplomacy",
-    3: "Creativity, communication, artistic expression", 4: "Stability, hard work, practical foundation",
-    5: "Freedom, adventure, dynamic change", 6: "Nurturing, responsibility, home and family",
-    7: "Spirituality, introspection, mystical wisdom", 8: "Material success, authority, business acumen",
-    9: "Universal love, humanitarian service, completion", 11: "Intuition, inspiration, spiritual messenger",
-    22: "Master builder, large-scale achievement", 33: "Master teacher, spiritual uplifment of humanity"
-};
+// --- Request Deadlines ---
+// Every request gets a latency budget (`deadline_ms` in the body, capped, or REQUEST_DEADLINE_MS).
+// Gemini may use up to GEMINI_BUDGET_SHARE of it; the per-name domain and trademark checks get
+// whatever is left minus FINALIZE_RESERVE_MS, which is kept for founder analysis, dates and
+// serialization. Upstream calls still running at their stage deadline are aborted and the affected
+// fields fall back to getFallbackDomainData / getFallbackTrademarkData, marked in `degraded`.
+const DEFAULT_DEADLINE_MS = readIntEnv("REQUEST_DEADLINE_MS", 25000);
+const MAX_DEADLINE_MS = readIntEnv("REQUEST_DEADLINE_MAX_MS", 120000);
+const GEMINI_BUDGET_SHARE = 0.5;
+const FINALIZE_RESERVE_MS = 500;
 
-function cleanName(name) { return name.replace(/[^A-Za-z]/g, '').toUpperCase(); }
-function reduceToSingleDigit(number, allowMaster = true) { /* ... (same as before) ... */ 
-    if (allowMaster && MASTER_NUMBERS.has(number)) return number;
-    while (number > 9) {
-        number = String(number).split('').reduce((sum, digit) => sum + parseInt(digit), 0);
-        if (allowMaster && MASTER_NUMBERS.has(number)) break;
-    }
-    return number;
-}
-function calculateHarmonyScore(name, system, kabbalistic = false) { /* ... (same as before) ... */
-    if (!name) return 0.0;
-    const values = name.split('').map(char => system[char] || 0);
-    const avgValue = values.reduce((sum, val) => sum + val, 0) / values.length;
-    const baseScore = Math.min(avgValue / (kabbalistic ? 26 : 9), 1.0) * 5;
-    const uniqueValues = new Set(values).size;
-    const balanceBonus = Math.min(uniqueValues / values.length, 0.5) * 2;
-    let flowScore = 0;
-    if (values.length > 1) {
-        const transitions = [];
-        for (let i = 1; i < values.length; i++) { transitions.push(Math.abs(values[i] - values[i - 1])); }
-        const avgTransition = transitions.reduce((sum, val) => sum + val, 0) / transitions.length;
-        const maxPossible = kabbalistic ? 25 : 8;
-        flowScore = Math.max(0, (maxPossible - avgTransition) / maxPossible) * 3;
-    }
-    const totalScore = baseScore + balanceBonus + flowScore;
-    return Math.min(totalScore, 10.0);
-}
-function calculatePythagorean(name) { /* ... (same as before) ... */ 
-    const cleanedName = cleanName(name);
-    const total = cleanedName.split('').reduce((sum, char) => sum + (PYTHAGOREAN[char] || 0), 0);
-    const destiny = reduceToSingleDigit(total);
-    const harmonyScore = calculateHarmonyScore(cleanedName, PYTHAGOREAN);
-    return { expression: total, destiny: destiny, meaning: MEANINGS[destiny] || "Unique energy pattern", harmonyScore: parseFloat(harmonyScore.toFixed(1)) };
-}
-function calculateChaldean(name) { /* ... (same as before) ... */ 
-    const cleanedName = cleanName(name);
-    const total = cleanedName.split('').reduce((sum, char) => sum + (CHALDEAN[char] || 0), 0);
-    const destiny = reduceToSingleDigit(total);
-    const harmonyScore = calculateHarmonyScore(cleanedName, CHALDEAN);
-    return { expression: total, destiny: destiny, meaning: MEANINGS[destiny] || "Unique energy pattern", harmonyScore: parseFloat(harmonyScore.toFixed(1)) };
-}
-function calculateKabbalistic(name) { /* ... (same as before) ... */ 
-    const cleanedName = cleanName(name);
-    const total = cleanedName.split('').reduce((sum, char) => sum + (KABBALISTIC[char] || 0), 0);
-    const destiny = reduceToSingleDigit(total);
-    const harmonyScore = calculateHarmonyScore(cleanedName, KABBALISTIC, true);
-    return { expression: total, destiny: destiny, meaning: MEANINGS[destiny] || "Unique energy pattern", harmonyScore: parseFloat(harmonyScore.toFixed(1)) };
-}
-function calculateLifePath(birthDateStr) { /* ... (same as before) ... */ 
-    try {
-        const [year, month, day] = birthDateStr.split('-').map(Number);
-        const dayReduced = reduceToSingleDigit(day);
-        const monthReduced = reduceToSingleDigit(month);
-        const yearReduced = reduceToSingleDigit(year);
-        const total = dayReduced + monthReduced + yearReduced;
-        return reduceToSingleDigit(total);
-    } catch (e) { return 1; }
-}
-function calculateFounderNumerology(name, birthdateStr) { /* ... (same as before) ... */ 
-    const lifePath = calculateLifePath(birthdateStr);
-    return { pythagorean: { ...calculatePythagorean(name), lifePathNumber: lifePath }, chaldean: { ...calculateChaldean(name), lifePathNumber: reduceToSingleDigit(lifePath) }, kabbalistic: { ...calculateKabbalistic(name), lifePathNumber: lifePath } };
-}
-function calculateNameCompatibility(businessName, founderName, birthdateStr) { /* ... (same as before) ... */
-    const businessNum = calculatePythagorean(businessName);
-    const founderNum = calculateFounderNumerology(founderName, birthdateStr);
-    const businessDestiny = businessNum.destiny;
-    const founderDestiny = founderNum.pythagorean.destiny;
-    let compatibility;
-    const difference = Math.abs(businessDestiny - founderDestiny);
-    if (difference === 0) compatibility = 100;
-    else if (difference <= 2) compatibility = 90 - (difference * 5);
-    else if (difference <= 4) compatibility = 80 - (difference * 3);
-    else compatibility = 70 - (difference * 2);
-    const complementaryPairs = [[1, 8], [2, 7], [3, 6], [4, 5]];
-    for (const pair of complementaryPairs) { if ((businessDestiny === pair[0] && founderDestiny === pair[1]) || (businessDestiny === pair[1] && founderDestiny === pair[0])) { compatibility += 10; } }
-    return Math.min(compatibility, 100);
-}
-function calculateOptimalDates(businessName, founderBirthdateStr) { /* ... (same as before, ensure Date and toLocaleDateString are Deno compatible or adjusted) ... */
-    const businessNumDestiny = calculatePythagorean(businessName).destiny;
-    const founderLifePath = calculateLifePath(founderBirthdateStr);
-    const optimalDates = [];
-    const today = new Date(); // Deno supports new Date()
-    const energyTypes = { 1: "Leadership & New Beginnings", /* ... */ };
-    const planetaryInfluences = { 1: "Sun - Leadership & Vitality", /* ... */ };
-
-    for (let daysAhead = 30; daysAhead <= 90; daysAhead++) {
-        const checkDate = new Date(today);
-        checkDate.setDate(today.getDate() + daysAhead);
-        const checkDateStr = `${checkDate.getFullYear()}-${String(checkDate.getMonth() + 1).padStart(2, '0')}-${String(checkDate.getDate()).padStart(2, '0')}`;
-        const dateNumerology = calculateLifePath(checkDateStr);
-        const businessCompat = 100 - Math.abs(businessNumDestiny - dateNumerology) * 10;
-        const founderCompat = 100 - Math.abs(founderLifePath - dateNumerology) * 10;
-        const overallCompat = (businessCompat + founderCompat) / 2;
-        if (overallCompat >= 85) {
-            optimalDates.push({
-                date: checkDateStr, numerologyValue: dateNumerology, compatibility: Math.floor(overallCompat),
-                energyType: energyTypes[dateNumerology] || "Unique Energy",
-                description: `Excellent alignment...`, // Simplified
-                dayOfWeek: checkDate.toLocaleDateString('en-US', { weekday: 'long' }), // Deno supports toLocaleDateString
-                planetaryInfluence: planetaryInfluences[dateNumerology] || "Universal Energy"
-            });
+function createDeadline(requestData) {
+    const requested = Number(requestData.deadline_ms);
+    const budgetMs = Number.isFinite(requested) && requested > 0 ? Math.min(requested, MAX_DEADLINE_MS) : DEFAULT_DEADLINE_MS;
+    const startedAt = Date.now();
+    return {
+        budgetMs,
+        startedAt,
+        geminiDeadline: startedAt + budgetMs * GEMINI_BUDGET_SHARE,
+        analysisDeadline: startedAt + Math.max(budgetMs - FINALIZE_RESERVE_MS, budgetMs * GEMINI_BUDGET_SHARE),
+        analysisSignal: null
+    };
+}
+
+function signalUntil(deadlineAt) {
+    return AbortSignal.timeout(Math.max(1, Math.round(deadlineAt - Date.now())));
+}
+
+// Upstream calls take { signal, at }: the signal aborts the call, and `at` lets the scheduler skip
+// retries (e.g. a long Retry-After) that could not finish in time anyway.
+function upstreamDeadline(deadlineAt) {
+    return { signal: signalUntil(deadlineAt), at: deadlineAt };
+}
+
+// The end of the whole request budget, for the database writes that follow the analysis
+function requestDeadline(requestContext) {
+    const { startedAt, budgetMs } = requestContext.deadline;
+    return upstreamDeadline(startedAt + budgetMs);
+}
+
+// One signal shared by every name's domain and trademark checks
+function getAnalysisDeadline(requestContext) {
+    const { deadline } = requestContext;
+    deadline.analysisSignal ??= signalUntil(deadline.analysisDeadline);
+    return { signal: deadline.analysisSignal, at: deadline.analysisDeadline };
+}
+
+function isDeadlineAbort(error) {
+    return error?.name === 'TimeoutError' || error?.name === 'AbortError';
+}
+
+// Loads shared through cache.getOrLoad run on their own UPSTREAM_TIMEOUT_MS budget, never on the
+// deadline of whichever request happened to start them, so a short-deadline caller cannot fail
+// the requests that joined its load. Each caller waits only until its own deadline, and a caller
+// that still has time when a shared load times out starts a fresh one.
+const UPSTREAM_TIMEOUT_MS = readIntEnv("UPSTREAM_TIMEOUT_MS", 15000);
+const MAX_SHARED_LOAD_ATTEMPTS = 3;
+
+function sharedUpstreamDeadline(timeoutMs = UPSTREAM_TIMEOUT_MS) {
+    return upstreamDeadline(Date.now() + timeoutMs);
+}
+
+// Settles like promise, or rejects with the caller's abort reason once its own deadline passes
+function waitWithin(promise, deadline) {
+    if (!deadline) return promise;
+    const { signal } = deadline;
+    if (signal.aborted) return Promise.reject(signal.reason);
+    return new Promise((resolve, reject) => {
+        const onAbort = () => reject(signal.reason);
+        signal.addEventListener('abort', onAbort, { once: true });
+        promise.then(resolve, reject).finally(() => signal.removeEventListener('abort', onAbort));
+    });
+}
+
+async function getOrLoadWithin(cache, key, loader, deadline) {
+    for (let attempt = 1; ; attempt++) {
+        try {
+            return await waitWithin(cache.getOrLoad(key, loader), deadline);
+        } catch (e) {
+            const callerHasTime = deadline && !deadline.signal.aborted && Date.now() < deadline.at;
+            if (!isDeadlineAbort(e) || !callerHasTime || attempt >= MAX_SHARED_LOAD_ATTEMPTS) throw e;
         }
     }
-    optimalDates.sort((a, b) => b.compatibility - a.compatibility);
-    return optimalDates.slice(0, 3);
 }
-// --- End Numerology Logic ---
+// --- End Request Deadlines ---
 
 // --- Gemini Service (to be adapted to use fetch with Gemini REST API) ---
-async function generateNamesWithGemini(requestData) {
-    console.log("Attempting to generate names with Gemini...");
-    const apiKey = Deno.env.get("GEMINI_API_KEY");
-    if (!apiKey) {
-        console.error("GEMINI_API_KEY is not set.");
-        return ["GeminiFallback1", "GeminiFallback2"]; // Fallback
-    }
+const GEMINI_API_HOST = 'generativelanguage.googleapis.com';
+// *_API_BASE_URL overrides let the load-test harness point the function at local stand-ins
+const GEMINI_API_BASE_URL = Deno.env.get("GEMINI_API_BASE_URL") || `https://${GEMINI_API_HOST}`;
+configureUpstreamHost(new URL(GEMINI_API_BASE_URL).host, {
+    concurrency: readIntEnv("GEMINI_MAX_CONCURRENCY", 2),
+    ratePerSecond: readIntEnv("GEMINI_RATE_PER_SECOND", 2),
+    burst: readIntEnv("GEMINI_RATE_BURST", 4)
+});
 
-    const GEMINI_API_ENDPOINT = `https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key=${apiKey}`;
-    
-    // Simplified prompt creation from previous geminiService.js
-    const { num_suggestions = 10, industry = 'general', business_description = 'a new venture' } = requestData;
-    const promptText = `Generate ${num_suggestions} creative business names for a ${industry} company. Business description: ${business_description}. Return as a JSON array of strings.`;
+// Generated names keyed on the normalized prompt inputs, so retries, double-clicks and re-submitted
+// forms reuse one Gemini round trip. Fallback lists from failed calls are never cached. The shared call
+// runs on GEMINI_TIMEOUT_MS; each request waits for it only until its own Gemini deadline.
+const GEMINI_TIMEOUT_MS = readIntEnv("GEMINI_TIMEOUT_MS", 30000);
+const geminiCache = createTtlCache({
+    maxEntries: readIntEnv("GEMINI_CACHE_MAX_ENTRIES", 500),
+    ttlMs: readIntEnv("GEMINI_CACHE_TTL_SECONDS", 15 * 60) * 1000
+});
+
+function normalizePromptText(text) {
+    return String(text).toLowerCase().replace(/\s+/g, ' ').replace(/[\s.!?,;:]+$/, '').trim();
+}
+
+function getGeminiCacheKey(num_suggestions, industry, business_description) {
+    return `${Number(num_suggestions)}|${normalizePromptText(industry)}|${normalizePromptText(business_description)}`;
+}
 
+async function fetchGeminiNames(promptText, num_suggestions, apiKey, deadline) {
+    const GEMINI_API_ENDPOINT = `${GEMINI_API_BASE_URL}/v1beta/models/gemini-1.5-flash:generateContent?key=${apiKey}`;
     try {
-        const response = await fetch(GEMINI_API_ENDPOINT, {
+        const response = await scheduledFetch(GEMINI_API_ENDPOINT, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 contents: [{ parts: [{ text: promptText }] }],
-                generationConfig: { temperature: 0.9, topP: 0.95, topK: 40, maxOutputTokens: 1024 }
-            })
+                generationConfig: { temperature: 0.9, topP: 0.95, topK: 40, maxOutputTokens: Math.max(1024, num_suggestions * 16) }
+            }),
+            signal: deadline?.signal,
+            deadlineAt: deadline?.at
         });
         if (!response.ok) {
             const errorBody = await response.text();
             console.error(`Gemini API error: ${response.status}`, errorBody);
-            return ["GeminiErrorFallback1", "GeminiErrorFallback2"];
+            return { names: ["GeminiErrorFallback1", "GeminiErrorFallback2"], ok: false };
         }
         const data = await response.json();
         // Basic parsing, assuming response structure like { candidates: [{ content: { parts: [{ text: "[\"Name1\", \"Name2\"]" }] } }] }
         const jsonResponseText = data.candidates?.[0]?.content?.parts?.[0]?.text;
         if (jsonResponseText) {
-            return JSON.parse(jsonResponseText);
+            return { names: JSON.parse(jsonResponseText), ok: true };
         }
-        return ["GeminiParseFallback"];
+        return { names: ["GeminiParseFallback"], ok: false };
     } catch (error) {
+        if (isDeadlineAbort(error)) throw error;
         console.error("Error calling Gemini API:", error);
-        return ["GeminiCatchFallback"];
+        return { names: ["GeminiCatchFallback"], ok: false };
+    }
+}
+
+// Records where the names came from in requestContext.stats.gemini ('cache', 'inflight' or 'upstream').
+// `refresh: true` in the request skips the cached entry and replaces it. Rejects with the deadline's
+// abort reason when no names arrive before `deadline`.
+async function generateNamesWithGemini(requestData, deadline = undefined, requestContext = null) {
+    console.log("Attempting to generate names with Gemini...");
+    const apiKey = Deno.env.get("GEMINI_API_KEY");
+    if (!apiKey) {
+        console.error("GEMINI_API_KEY is not set.");
+        return ["GeminiFallback1", "GeminiFallback2"]; // Fallback
     }
+
+    // Simplified prompt creation from previous geminiService.js
+    const { num_suggestions = 10, industry = 'general', business_description = 'a new venture' } = requestData;
+    const promptText = `Generate ${num_suggestions} creative business names for a ${industry} company. Business description: ${business_description}. Return as a JSON array of strings.`;
+
+    const cacheKey = getGeminiCacheKey(num_suggestions, industry, business_description);
+    if (requestData.refresh) geminiCache.delete(cacheKey);
+    const { value: names, source } = await getOrLoadWithin(geminiCache, cacheKey, async () => {
+        const result = await fetchGeminiNames(promptText, num_suggestions, apiKey, sharedUpstreamDeadline(GEMINI_TIMEOUT_MS));
+        return { value: result.names, ttlMs: result.ok && Array.isArray(result.names) ? undefined : 0 };
+    }, deadline);
+    if (requestContext) requestContext.stats.gemini = { source, fromCache: source !== 'upstream' };
+    return Array.isArray(names) ? [...names] : names; // Cached arrays are shared between requests
 }
 // --- End Gemini Service ---
 
@@ -185,6 +194,12 @@ const DOMAIN_SCORES = {
     '.com': 25, '.net': 3, '.org': 2, '.co': 2, '.io': 2, '.biz': 1, '.us': 1
 };
 const RAPIDAPI_HOST_DOMAINR = 'domainr.p.rapidapi.com';
+const DOMAINR_API_BASE_URL = Deno.env.get("DOMAINR_API_BASE_URL") || `https://${RAPIDAPI_HOST_DOMAINR}`;
+configureUpstreamHost(new URL(DOMAINR_API_BASE_URL).host, {
+    concurrency: readIntEnv("DOMAINR_MAX_CONCURRENCY", 4),
+    ratePerSecond: readIntEnv("DOMAINR_RATE_PER_SECOND", 5),
+    burst: readIntEnv("DOMAINR_RATE_BURST", 5)
+});
 
 function cleanDomainNameForApi(businessName) {
     let cleanName = businessName.toLowerCase().replace(/[^a-z0-9]/g, '');
@@ -215,37 +230,94 @@ function getFallbackDomainData() {
     return { domains: fallbackResults, totalScore, maxPossibleScore: Object.values(DOMAIN_SCORES).reduce((sum, s) => sum + s, 0) };
 }
 
-async function checkSingleDomain(domain, tld, apiKey) {
-    const url = `https://${RAPIDAPI_HOST_DOMAINR}/v2/search?query=${encodeURIComponent(domain)}`; // Added encodeURIComponent
+// Availability per base label ({ '.com': true, ... }), shared across warm invocations.
+// Upstream failures are cached too, for a shorter TTL, so a failing label is not retried on every request.
+const domainCache = createTtlCache({
+    maxEntries: readIntEnv("DOMAIN_CACHE_MAX_ENTRIES", 5000),
+    ttlMs: readIntEnv("DOMAIN_CACHE_TTL_SECONDS", 6 * 60 * 60) * 1000
+});
+const DOMAIN_NEGATIVE_TTL_MS = readIntEnv("DOMAIN_CACHE_NEGATIVE_TTL_SECONDS", 5 * 60) * 1000;
+
+// One Domainr search on the base label covers every TLD in DOMAIN_SCORES: `defaults` makes Domainr
+// return those zones even when it would not suggest them. A TLD still missing from the results was
+// not checked, so it is counted as unavailable rather than scored as free.
+const DOMAINR_DEFAULT_ZONES = Object.keys(DOMAIN_SCORES).map(tld => tld.slice(1)).join(',');
+
+async function checkSingleDomain(domainBase, apiKey, deadline = undefined) {
+    const url = `${DOMAINR_API_BASE_URL}/v2/search?query=${encodeURIComponent(domainBase)}&defaults=${DOMAINR_DEFAULT_ZONES}`;
+    const tlds = Object.keys(DOMAIN_SCORES);
+    const unavailable = Object.fromEntries(tlds.map(tld => [tld, false]));
     try {
-        const response = await fetch(url, {
+        const response = await scheduledFetch(url, {
             method: 'GET',
             headers: {
                 'x-rapidapi-host': RAPIDAPI_HOST_DOMAINR,
                 'x-rapidapi-key': apiKey
-            }
+            },
+            signal: deadline?.signal,
+            deadlineAt: deadline?.at
         });
         if (response.ok) {
             const data = await response.json();
-            let available = true; 
+            const statusByDomain = new Map();
             if (data.results && data.results.length > 0) {
-                 const domainEntry = data.results.find(r => r.domain && r.domain.toLowerCase() === domain.toLowerCase());
-                 if (domainEntry) {
-                    available = ['available', 'maybe'].includes(domainEntry.status);
-                 }
+                data.results.forEach(r => {
+                    if (r.domain) statusByDomain.set(r.domain.toLowerCase(), r.status);
+                });
             }
-            return { tld, domain, available };
+            const availability = {};
+            const unchecked = [];
+            tlds.forEach(tld => {
+                const domain = `${domainBase}${tld}`;
+                if (!statusByDomain.has(domain)) unchecked.push(tld);
+                availability[tld] = statusByDomain.has(domain) && ['available', 'maybe'].includes(statusByDomain.get(domain));
+            });
+            if (unchecked.length > 0) console.warn(`Domainr returned no result for ${domainBase} in ${unchecked.join(', ')}; counted as unavailable`);
+            return { availability, ok: true };
         } else {
-            console.warn(`Domainr API returned status ${response.status} for ${domain}. Body: ${await response.text()}`);
-            return { tld, domain, available: false };
+            console.warn(`Domainr API returned status ${response.status} for ${domainBase}. Body: ${await response.text()}`);
+            return { availability: unavailable, ok: false };
         }
     } catch (e) {
-        console.error(`Error checking Domainr for ${domain}:`, e);
-        return { tld, domain, available: false };
+        if (isDeadlineAbort(e)) throw e; // Not an upstream answer, so it must not be cached
+        console.error(`Error checking Domainr for ${domainBase}:`, e);
+        return { availability: unavailable, ok: false };
     }
 }
 
-async function checkDomainAvailability(businessName) {
+// Optional Bloom filter over a local registered-domain list (see _shared/domain_prefilter.ts).
+// TLDs it reports as registered are marked taken without asking Domainr. One Domainr search answers
+// every TLD for a label, so the search is skipped when every zone the filter covers is taken; lists
+// built from zone files usually cover only .com/.net. The scored zones the filter does not cover are
+// then left unchecked: they score as unavailable and are listed in `uncheckedTlds`.
+loadDomainPrefilter(); // Start reading the filter at cold start rather than on the first request
+
+async function lookupDomainAvailability(domainBase, apiKey, requestContext) {
+    const tlds = Object.keys(DOMAIN_SCORES);
+    const prefilter = await loadDomainPrefilter();
+    const registered = prefilter ? findRegisteredTlds(prefilter, domainBase, tlds) : [];
+    const stats = requestContext?.stats.domains;
+    if (stats) stats.prefilterHits += registered.length;
+    const coveredCount = prefilter ? tlds.filter(tld => prefilter.tlds.includes(tld)).length : 0;
+    if (coveredCount > 0 && registered.length === coveredCount) {
+        if (stats) stats.prefilterSkipped++;
+        return {
+            availability: Object.fromEntries(tlds.map(tld => [tld, false])),
+            prefilterHits: registered,
+            uncheckedTlds: tlds.filter(tld => !registered.includes(tld)),
+            source: 'prefilter'
+        };
+    }
+    const { value, source } = await getOrLoadWithin(domainCache, domainBase, async () => {
+        const result = await checkSingleDomain(domainBase, apiKey, sharedUpstreamDeadline());
+        return { value: result.availability, ttlMs: result.ok ? undefined : DOMAIN_NEGATIVE_TTL_MS };
+    }, requestContext ? getAnalysisDeadline(requestContext) : undefined);
+    const availability = { ...value };
+    registered.forEach(tld => { availability[tld] = false; });
+    return { availability, prefilterHits: registered, uncheckedTlds: [], source };
+}
+
+async function checkDomainAvailability(businessName, requestContext = null) {
     console.log(`Domain check for: ${businessName}`);
     const apiKey = Deno.env.get("RAPIDAPI_KEY");
     if (!apiKey) {
@@ -257,32 +329,31 @@ async function checkDomainAvailability(businessName) {
     const availabilityResults = {};
     let totalScore = 0;
 
-    const tasks = Object.keys(DOMAIN_SCORES).map(tld => {
-        const domain = `${domainBase}${tld}`;
-        return checkSingleDomain(domain, tld, apiKey);
-    });
-
     try {
-        const results = await Promise.all(tasks);
-        results.forEach(result => {
-            if (result) {
-                const { tld, available } = result;
-                const scoreValue = DOMAIN_SCORES[tld];
-                const currentScore = available ? scoreValue : 0;
-                availabilityResults[tld] = {
-                    available,
-                    value: currentScore,
-                    priority: getDomainPriority(tld)
-                };
-                totalScore += currentScore;
-            }
+        const { availability, prefilterHits, uncheckedTlds } = await lookupDomainAvailability(domainBase, apiKey, requestContext);
+        Object.keys(DOMAIN_SCORES).forEach(tld => {
+            const available = availability[tld];
+            const scoreValue = DOMAIN_SCORES[tld];
+            const currentScore = available ? scoreValue : 0;
+            availabilityResults[tld] = {
+                available,
+                value: currentScore,
+                priority: getDomainPriority(tld)
+            };
+            totalScore += currentScore;
         });
         return {
             domains: availabilityResults,
             totalScore,
-            maxPossibleScore: Object.values(DOMAIN_SCORES).reduce((sum, s) => sum + s, 0)
+            maxPossibleScore: Object.values(DOMAIN_SCORES).reduce((sum, s) => sum + s, 0),
+            prefilterHits, // TLDs marked taken by the local prefilter
+            uncheckedTlds // TLDs scored as unavailable without a check because the prefilter skipped Domainr
         };
     } catch (e) {
+        if (isDeadlineAbort(e)) {
+            console.warn(`Domain check for ${businessName} cancelled at the request deadline`);
+            return { ...getFallbackDomainData(), degraded: 'deadline' };
+        }
         console.error("Error in checkDomainAvailability aggregation:", e);
         return getFallbackDomainData();
     }
@@ -291,6 +362,12 @@ async function checkDomainAvailability(businessName) {
 
 // --- Trademark Service (adapted from previous trademarkService.js) ---
 const RAPIDAPI_HOST_USPTO = 'uspto-trademark.p.rapidapi.com';
+const USPTO_API_BASE_URL = Deno.env.get("USPTO_API_BASE_URL") || `https://${RAPIDAPI_HOST_USPTO}`;
+configureUpstreamHost(new URL(USPTO_API_BASE_URL).host, {
+    concurrency: readIntEnv("USPTO_MAX_CONCURRENCY", 4),
+    ratePerSecond: readIntEnv("USPTO_RATE_PER_SECOND", 5),
+    burst: readIntEnv("USPTO_RATE_BURST", 5)
+});
 
 function cleanTrademarkNameForApi(businessName) {
     const suffixes = ['LLC', 'Inc', 'Corp', 'Corporation', 'Company', 'Co', 'Ltd', 'Limited'];
@@ -316,17 +393,6 @@ function generateTrademarkSearchVariations(searchTerm) {
     return Array.from(variations);
 }
 
-function calculateStringsSimilarity(term1, term2) {
-    term1 = term1.toLowerCase();
-    term2 = term2.toLowerCase();
-    if (term1 === term2) return 1.0;
-    const set1 = new Set(term1.split(''));
-    const set2 = new Set(term2.split(''));
-    const intersection = new Set([...set1].filter(x => set2.has(x)));
-    const union = new Set([...set1, ...set2]);
-    return union.size === 0 ? 0 : intersection.size / union.size;
-}
-
 function getFallbackTrademarkData() {
     return {
         status: 'unknown', similarMarks: 0, riskLevel: 'unknown', score: 15,
@@ -334,15 +400,17 @@ function getFallbackTrademarkData() {
     };
 }
 
-async function checkSingleTrademarkVariation(searchTermVariation, apiKey) {
-    const url = `https://${RAPIDAPI_HOST_USPTO}/v1/trademarkAvailable/${encodeURIComponent(searchTermVariation)}`;
+async function checkSingleTrademarkVariation(searchTermVariation, apiKey, deadline = undefined) {
+    const url = `${USPTO_API_BASE_URL}/v1/trademarkAvailable/${encodeURIComponent(searchTermVariation)}`;
     try {
-        const response = await fetch(url, {
+        const response = await scheduledFetch(url, {
             method: 'GET',
             headers: {
                 'x-rapidapi-host': RAPIDAPI_HOST_USPTO,
                 'x-rapidapi-key': apiKey
-            }
+            },
+            signal: deadline?.signal,
+            deadlineAt: deadline?.at
         });
         if (response.ok) {
             const data = await response.json();
@@ -363,14 +431,15 @@ async function checkSingleTrademarkVariation(searchTermVariation, apiKey) {
                 }
                 details = data.description || `Checked: ${searchTermVariation}`;
             }
-            return { available, details, status: apiStatus };
+            return { result: { available, details, status: apiStatus }, ok: true };
         } else {
             console.warn(`USPTO API returned status ${response.status} for ${searchTermVariation}. Body: ${await response.text()}`);
-            return { available: true, details: 'API error, assuming available' }; // Fallback on API error
+            return { result: { available: true, details: 'API error, assuming available' }, ok: false }; // Fallback on API error
         }
     } catch (e) {
+        if (isDeadlineAbort(e)) throw e; // Not an upstream answer, so it must not be cached
         console.error(`Error checking USPTO for ${searchTermVariation}:`, e);
-        return { available: true, details: 'Check failed, assuming available' }; // Fallback on fetch error
+        return { result: { available: true, details: 'Check failed, assuming available' }, ok: false }; // Fallback on fetch error
     }
 }
 
@@ -390,7 +459,100 @@ function assessTrademarkRisk(exactResult, similarResults) {
     return { status: 'clear', risk_level: 'low', score: 20 }; // No exact and no similar conflicts
 }
 
-async function checkTrademark(businessName, industry = "") { // Renamed from checkTrademarkAvailability for clarity
+// USPTO results keyed on the normalized search term, shared across names and warm invocations.
+const trademarkCache = createTtlCache({
+    maxEntries: readIntEnv("TRADEMARK_CACHE_MAX_ENTRIES", 5000),
+    ttlMs: readIntEnv("TRADEMARK_CACHE_TTL_SECONDS", 12 * 60 * 60) * 1000
+});
+const TRADEMARK_NEGATIVE_TTL_MS = readIntEnv("TRADEMARK_CACHE_NEGATIVE_TTL_SECONDS", 5 * 60) * 1000;
+
+function normalizeTrademarkTerm(term) {
+    return term.toLowerCase().replace(/\s+/g, ' ').trim();
+}
+
+async function lookupTrademarkTerm(term, apiKey, requestContext) {
+    const key = normalizeTrademarkTerm(term);
+    const stats = requestContext?.stats.trademark;
+    if (stats) {
+        stats.lookups++;
+        if (stats.terms.has(key)) stats.duplicateTerms++;
+        stats.terms.add(key);
+    }
+    const { value, source } = await getOrLoadWithin(trademarkCache, key, async () => {
+        const { result, ok } = await checkSingleTrademarkVariation(term, apiKey, sharedUpstreamDeadline());
+        return { value: result, ttlMs: ok ? undefined : TRADEMARK_NEGATIVE_TTL_MS };
+    }, requestContext ? getAnalysisDeadline(requestContext) : undefined);
+    if (stats) {
+        if (source === 'cache') stats.cacheHits++;
+        else if (source === 'inflight') stats.coalesced++;
+        else stats.upstreamCalls++;
+    }
+    return value;
+}
+
+function createTrademarkLookupStats() {
+    return { lookups: 0, duplicateTerms: 0, cacheHits: 0, coalesced: 0, upstreamCalls: 0, indexChecks: 0, indexMatches: 0, terms: new Set() };
+}
+
+function summarizeTrademarkLookupStats(stats) {
+    const { terms, ...counts } = stats;
+    return { ...counts, uniqueTerms: terms.size };
+}
+
+// Optional local index over a bulk marks file (see _shared/trademark_index.ts). With it, near-matches
+// for the name and every variation come from the index, and USPTO is only asked to confirm the live
+// status of the exact mark and the closest TRADEMARK_INDEX_CONFIRM_LIMIT near-matches it found.
+// A limit of 0 trusts the index statuses and makes no USPTO calls at all.
+const TRADEMARK_INDEX_CONFIRM_LIMIT = readIntEnv("TRADEMARK_INDEX_CONFIRM_LIMIT", 3);
+const TRADEMARK_INDEX_MIN_SIMILARITY = 0.6;
+loadTrademarkIndex(); // Start reading the marks file at cold start rather than on the first request
+
+async function confirmIndexedMark(match, apiKey, requestContext) {
+    if (match.status === 'dead') return { available: true, details: `Only a dead mark matches: ${match.mark}`, status: 'dead', source: 'index' };
+    if (TRADEMARK_INDEX_CONFIRM_LIMIT === 0) {
+        return { available: false, details: `Matching mark in local index: ${match.mark}`, status: match.status, source: 'index' };
+    }
+    return { ...(await lookupTrademarkTerm(match.mark, apiKey, requestContext)), source: 'uspto' };
+}
+
+async function checkTrademarkWithIndex(index, searchTerm, apiKey, requestContext) {
+    const stats = requestContext?.stats.trademark;
+    const exactKey = normalizeMarkKey(searchTerm);
+    const nearMatches = new Map();
+    [searchTerm, ...generateTrademarkSearchVariations(searchTerm)].forEach(term => {
+        searchTrademarkIndex(index, term, { minSimilarity: TRADEMARK_INDEX_MIN_SIMILARITY }).forEach(match => {
+            const key = normalizeMarkKey(match.mark);
+            if (key === exactKey) return;
+            // Ranked by similarity to the full name, as on the USPTO-only path: a one-word mark found
+            // through a variation ("Vital") must not count as a 1.0 match for "Vital Core"
+            const similarity = Math.round(markSimilarity(searchTerm, match.mark) * 1000) / 1000;
+            const known = nearMatches.get(key);
+            if (!known || known.similarity < similarity) nearMatches.set(key, { ...match, similarity, matchedTerm: term });
+        });
+    });
+    const ranked = [...nearMatches.values()].sort((a, b) => b.similarity - a.similarity);
+    if (stats) { stats.indexChecks++; stats.indexMatches += ranked.length; }
+
+    const exactMark = findExactMark(index, searchTerm);
+    const checkExact = () => exactMark
+        ? confirmIndexedMark(exactMark, apiKey, requestContext)
+        : Promise.resolve({ available: true, details: 'No matching mark in local index', source: 'index' });
+    const checkNearMatches = () => Promise.all(
+        ranked.slice(0, TRADEMARK_INDEX_CONFIRM_LIMIT || ranked.length).map(match =>
+            confirmIndexedMark(match, apiKey, requestContext).then(result => result.available ? null : {
+                term: match.mark, similarity: match.similarity, matchedTerm: match.matchedTerm,
+                serialNumber: match.serialNumber, details: result.details || 'Similar trademark found'
+            }))
+    ).then(results => results.filter(r => r !== null));
+
+    const speculativeNearMatches = requestContext?.trademarkSpeculative ? checkNearMatches() : null;
+    speculativeNearMatches?.catch(() => null); // Settled below, or abandoned if the exact term is taken
+    const exactResult = await checkExact();
+    const similarConflictingMarks = exactResult.available ? await (speculativeNearMatches ?? checkNearMatches()) : [];
+    return { exactResult, similarConflictingMarks, indexMatches: ranked.slice(0, 10) };
+}
+
+async function checkTrademark(businessName, industry = "", requestContext = null) { // Renamed from checkTrademarkAvailability for clarity
     console.log(`Trademark check for: ${businessName}, industry: ${industry}`);
     const apiKey = Deno.env.get("RAPIDAPI_KEY");
     if (!apiKey) {
@@ -399,54 +561,94 @@ async function checkTrademark(businessName, industry = "") { // Renamed from che
     }
 
     const searchTerm = cleanTrademarkNameForApi(businessName);
+    const speculative = requestContext?.trademarkSpeculative ?? false;
     try {
-        const exactResult = await checkSingleTrademarkVariation(searchTerm, apiKey);
+        const index = await loadTrademarkIndex();
+        if (index) {
+            const { exactResult, similarConflictingMarks, indexMatches } = await checkTrademarkWithIndex(index, searchTerm, apiKey, requestContext);
+            return buildTrademarkResult(searchTerm, exactResult, similarConflictingMarks, indexMatches);
+        }
 
-        let similarConflictingMarks = [];
-        if (exactResult.available) { // Only check variations if exact is available
+        const checkVariations = () => {
             const variations = generateTrademarkSearchVariations(searchTerm);
             const similarCheckTasks = variations.slice(0, 3).map(variation => // Limit API calls
-                checkSingleTrademarkVariation(variation, apiKey).then(result => {
+                lookupTrademarkTerm(variation, apiKey, requestContext).then(result => {
                     if (result && !result.available) { // Found a conflicting similar mark
-                        return { term: variation, similarity: calculateStringsSimilarity(searchTerm, variation), details: result.details || 'Similar trademark found' };
+                        return { term: variation, similarity: markSimilarity(searchTerm, variation), details: result.details || 'Similar trademark found' };
                     }
                     return null;
                 })
             );
-            const similarResultsRaw = await Promise.all(similarCheckTasks);
-            similarConflictingMarks = similarResultsRaw.filter(r => r !== null);
+            return Promise.all(similarCheckTasks).then(results => results.filter(r => r !== null));
+        };
+
+        // Speculative mode issues the exact and variation lookups together (one round trip instead of two);
+        // variation results are discarded when the exact term turns out to be taken.
+        const speculativeVariations = speculative ? checkVariations() : null;
+        speculativeVariations?.catch(() => null); // Settled below, or abandoned if the exact term is taken
+        const exactResult = await lookupTrademarkTerm(searchTerm, apiKey, requestContext);
+
+        let similarConflictingMarks = [];
+        if (exactResult.available) { // Only check variations if exact is available
+            similarConflictingMarks = await (speculativeVariations ?? checkVariations());
         }
-        
-        const riskAssessment = assessTrademarkRisk(exactResult, similarConflictingMarks);
 
-        return {
-            status: riskAssessment.status, 
-            similarMarks: similarConflictingMarks.length, // Number of conflicting similar marks
-            riskLevel: riskAssessment.risk_level, 
-            score: riskAssessment.score,
-            details: { 
-                exactMatch: exactResult, 
-                similarMarksFound: similarConflictingMarks.slice(0, 5), // Show details of conflicting ones
-                searchTerm: searchTerm 
-            }
-        };
+        return buildTrademarkResult(searchTerm, exactResult, similarConflictingMarks);
     } catch (e) {
+        if (isDeadlineAbort(e)) {
+            console.warn(`Trademark check for ${businessName} cancelled at the request deadline`);
+            return { ...getFallbackTrademarkData(), degraded: 'deadline' };
+        }
         console.error("Error in checkTrademark processing:", e);
         return getFallbackTrademarkData();
     }
 }
+
+function buildTrademarkResult(searchTerm, exactResult, similarConflictingMarks, indexMatches = undefined) {
+    const riskAssessment = assessTrademarkRisk(exactResult, similarConflictingMarks);
+    return {
+        status: riskAssessment.status, 
+        similarMarks: similarConflictingMarks.length, // Number of conflicting similar marks
+        riskLevel: riskAssessment.risk_level, 
+        score: riskAssessment.score,
+        details: { 
+            exactMatch: exactResult, 
+            similarMarksFound: similarConflictingMarks.slice(0, 5), // Show details of conflicting ones
+            searchTerm: searchTerm,
+            ...(indexMatches ? { indexMatches } : {}) // Ranked local near-matches, confirmed or not
+        }
+    };
+}
 // --- End Trademark Service ---
 
 // --- Main Orchestration (adapted from businessNameService.js) ---
-async function analyzeSingleName(name, requestData, index) {
+// Per-request state shared by every analyzeSingleName call in one invocation
+function createRequestContext(requestData) {
+    return {
+        // The client's session_id only asks to continue that session; recordAnalytics replaces it with the
+        // server-issued id the generation was actually stored under
+        sessionId: requestData.session_id ?? null,
+        trademarkSpeculative: requestData.trademark_speculative ?? Deno.env.get("TRADEMARK_SPECULATIVE") === "true",
+        compact: getCompactOptions(requestData),
+        stats: { trademark: createTrademarkLookupStats(), domains: { prefilterHits: 0, prefilterSkipped: 0 } },
+        timer: createStageTimer(),
+        deadline: createDeadline(requestData)
+    };
+}
+
+async function analyzeSingleName(name, requestData, index, numerology = getBatchNumerology(scoreNamesBatch([name]), 0), requestContext = createRequestContext(requestData)) {
     // Simplified version of the previous analyzeSingleName
-    const numerologyPythagorean = calculatePythagorean(name);
-    const numerologyChaldean = calculateChaldean(name);
-    const numerologyKabbalistic = calculateKabbalistic(name);
-    const overallHarmony = parseFloat(((numerologyPythagorean.harmonyScore + numerologyChaldean.harmonyScore + numerologyKabbalistic.harmonyScore) / 3).toFixed(1));
+    const overallHarmony = numerology.overallHarmony;
     
-    const domainResult = await checkDomainAvailability(name);
-    const trademarkResult = await checkTrademark(name, requestData.industry);
+    const { timer } = requestContext;
+    // Both checks share the request's analysis deadline, so they run side by side
+    const [domainResult, trademarkResult] = await Promise.all([
+        timer.time('domains', () => checkDomainAvailability(name, requestContext)),
+        timer.time('trademark', () => checkTrademark(name, requestData.industry, requestContext))
+    ]);
+    const degraded = [];
+    if (domainResult.degraded) degraded.push('domains');
+    if (trademarkResult.degraded) degraded.push('trademark');
 
     // Simplified entity compliance
     const entityCompliance = { conflicts: [], score: 8, LLC: true, Inc: true }; 
@@ -464,19 +666,630 @@ async function analyzeSingleName(name, requestData, index) {
         name: name,
         overallScore: Math.min(overallScore, 100),
         scoreBreakdown,
-        numerology: { 
-            pythagorean: numerologyPythagorean, 
-            chaldean: numerologyChaldean, 
-            kabbalistic: numerologyKabbalistic,
-            overallHarmony: overallHarmony
-        },
+        numerology,
         domainAvailability: domainResult.domains || {},
         domainScore: domainResult.totalScore || 0,
+        domainPrefilter: { hits: domainResult.prefilterHits ?? [], unchecked: domainResult.uncheckedTlds ?? [] },
         trademark: trademarkResult,
-        entityCompliance
+        entityCompliance,
+        degraded // Fields that fell back to default data because their upstream check missed the deadline
     };
 }
 
+function buildFounderAnalysis(analyzedNames, requestData, requestContext) {
+    if (!requestData.founder_name || !requestData.founder_birthdate) return null;
+    return requestContext.timer.timeSync('founder', () => {
+        const founder = { name: requestData.founder_name, birthdate: requestData.founder_birthdate };
+        const founderNumerology = getFounderProfile(founder.name, founder.birthdate);
+        const matrix = buildCompatibilityMatrix([founder], analyzedNames.map(nameData => nameData.name));
+        const compatibility = {};
+        analyzedNames.forEach((nameData, n) => {
+            compatibility[nameData.name] = matrix.compatibility[0][n];
+        });
+        return {
+            name: requestData.founder_name,
+            birthdate: requestData.founder_birthdate,
+            numerology: founderNumerology,
+            compatibility
+        };
+    });
+}
+
+// `founders: [{ name, birthdate }, ...]` (up to MAX_TEAM_FOUNDERS) scores the whole founding team
+// against every name: a founders x names compatibility matrix plus per-name team scores.
+const MAX_TEAM_FOUNDERS = 10;
+
+function getTeamFounders(requestData) {
+    if (!Array.isArray(requestData.founders)) return [];
+    return requestData.founders
+        .filter(founder => founder && founder.name && founder.birthdate)
+        .slice(0, MAX_TEAM_FOUNDERS)
+        .map(founder => ({ name: String(founder.name), birthdate: String(founder.birthdate) }));
+}
+
+function buildTeamAnalysis(analyzedNames, requestData, requestContext) {
+    const founders = getTeamFounders(requestData);
+    if (founders.length === 0 || analyzedNames.length === 0) return null;
+    return requestContext.timer.timeSync('team', () => {
+        const names = analyzedNames.map(nameData => nameData.name);
+        const { compatibility, teamScores } = buildCompatibilityMatrix(founders, names);
+        const rankedTeamScores = [...teamScores].sort((a, b) => (b.average - a.average) || (b.min - a.min));
+        return {
+            founders: founders.map(founder => ({ ...founder, numerology: getFounderProfile(founder.name, founder.birthdate) })),
+            names,
+            compatibility, // compatibility[founderIndex][nameIndex]
+            teamScores: rankedTeamScores,
+            bestName: rankedTeamScores[0].name
+        };
+    });
+}
+
+// `launch_window: { start_days, end_days, top_n, names }` widens the search (up to
+// CALENDAR_HORIZON_DAYS ahead) and, via launchCalendar, returns dates for the top `names` names too.
+function getLaunchWindow(requestData) {
+    const window = requestData.launch_window || {};
+    const endDays = Math.min(CALENDAR_HORIZON_DAYS, Math.max(0, Number(window.end_days ?? DEFAULT_LAUNCH_WINDOW.endDays) || 0));
+    const startDays = Math.min(endDays, Math.max(0, Number(window.start_days ?? DEFAULT_LAUNCH_WINDOW.startDays) || 0));
+    const topN = Math.max(1, Number(window.top_n) || DEFAULT_LAUNCH_WINDOW.topN);
+    return { startDays, endDays, topN };
+}
+
+// Expects analyzedNames in generation order, so ties resolve to the earliest name.
+function buildOptimalDates(analyzedNames, requestData, requestContext) {
+    let optimalDates = [];
+    if (analyzedNames.length > 0 && requestData.founder_birthdate) {
+        try {
+            const bestName = analyzedNames.reduce((max, name) => (name.overallScore > max.overallScore ? name : max), analyzedNames[0]);
+            optimalDates = requestContext.timer.timeSync('optimalDates', () =>
+                findOptimalDates([bestName.name], requestData.founder_birthdate, getLaunchWindow(requestData))[bestName.name]);
+        } catch (e) { console.error("Error calculating optimal dates:", e); }
+    }
+    return optimalDates;
+}
+
+function buildLaunchCalendar(analyzedNames, requestData, requestContext) {
+    if (!requestData.launch_window || !requestData.founder_birthdate || analyzedNames.length === 0) return null;
+    const window = getLaunchWindow(requestData);
+    const nameCount = Math.max(1, Number(requestData.launch_window.names) || analyzedNames.length);
+    const names = [...analyzedNames].sort((a, b) => (b.overallScore || 0) - (a.overallScore || 0))
+        .slice(0, nameCount).map(nameData => nameData.name);
+    try {
+        const dates = requestContext.timer.timeSync('launchCalendar', () => findOptimalDates(names, requestData.founder_birthdate, window));
+        return { window, dates };
+    } catch (e) {
+        console.error("Error building launch calendar:", e);
+        return null;
+    }
+}
+
+function buildResponseMetadata(analyzedNames, requestData, requestContext) {
+    return {
+        generatedAt: new Date().toISOString(),
+        totalNames: analyzedNames.length,
+        requestId: crypto.randomUUID(), // Deno's built-in UUID
+        sessionId: requestContext.sessionId,
+        requestData, // Echo back the request data
+        cache: { gemini: geminiCache.stats(), domains: domainCache.stats(), trademarks: trademarkCache.stats() },
+        gemini: requestContext.stats.gemini ?? null,
+        trademarkLookups: summarizeTrademarkLookupStats(requestContext.stats.trademark),
+        domainLookups: requestContext.stats.domains,
+        upstream: getSchedulerStats(),
+        timings: requestContext.timer.summary(),
+        funnel: requestContext.stats.funnel ?? null,
+        deadline: {
+            budgetMs: requestContext.deadline.budgetMs,
+            elapsedMs: Date.now() - requestContext.deadline.startedAt,
+            degradedNames: analyzedNames.filter(nameData => nameData.degraded.length > 0).length
+        }
+    };
+}
+
+// Analytics are updated at write time, but the response waits for the write only until the request
+// budget runs out; a slower write finishes in the background. Either way a failed or late write only
+// leaves the response without a session id, never fails the generation.
+async function recordAnalytics(analyzedNames, requestData, requestContext) {
+    const write = recordGeneration(requestContext.sessionId, requestData, analyzedNames);
+    runInBackground(write, 'analytics write');
+    try {
+        requestContext.sessionId = await requestContext.timer.time('analytics', () => waitWithin(write, requestDeadline(requestContext)));
+    } catch (e) {
+        requestContext.sessionId = null; // A failed write is logged by runInBackground
+        if (isDeadlineAbort(e)) console.warn("Analytics write outlived the request deadline; responding without a session id");
+    }
+}
+// --- End Main Orchestration ---
+
+// --- Candidate Funnel ---
+// Opt in with `"funnel": true` (or `{ "pool_size": n, "top_k": k }`). Gemini is asked for a larger
+// pool, every candidate is ranked on local-only signals (numerology harmony, domain label length and
+// cleanliness, include keywords), duplicates and excluded keywords are dropped, and only the top K
+// (num_suggestions by default) go on to the domain and trademark checks.
+const FUNNEL_POOL_MULTIPLIER = readIntEnv("FUNNEL_POOL_MULTIPLIER", 4);
+const FUNNEL_MAX_POOL = readIntEnv("FUNNEL_MAX_POOL", 100);
+const IDEAL_LABEL_MAX_LENGTH = 12;
+
+function parseKeywords(keywords) {
+    const list = Array.isArray(keywords) ? keywords : String(keywords ?? '').split(',');
+    return list.map(keyword => String(keyword).trim().toLowerCase()).filter(Boolean);
+}
+
+function getFunnelOptions(requestData) {
+    if (!requestData.funnel) return null;
+    const options = typeof requestData.funnel === 'object' ? requestData.funnel : {};
+    const topK = Math.max(1, Number(options.top_k) || Number(requestData.num_suggestions) || 10);
+    const poolSize = Math.min(FUNNEL_MAX_POOL, Math.max(topK, Number(options.pool_size) || topK * FUNNEL_POOL_MULTIPLIER));
+    return { topK, poolSize };
+}
+
+// Same point scale as the final score: numerology out of 40, plus up to 15 for the domain label
+// and up to 10 for requested keywords.
+function scoreCandidateLocally(name, overallHarmony, includeKeywords) {
+    const label = cleanDomainNameForApi(name);
+    const visibleChars = name.replace(/\s/g, '').length;
+    const lengthScore = label.length === 0 ? 0 : Math.max(0, 10 - Math.max(0, label.length - IDEAL_LABEL_MAX_LENGTH));
+    const cleanliness = visibleChars === 0 ? 0 : Math.min(label.length / visibleChars, 1) * 5;
+    const lowerName = name.toLowerCase();
+    const keywordScore = Math.min(includeKeywords.filter(keyword => lowerName.includes(keyword)).length * 5, 10);
+    return Math.min(Math.floor(overallHarmony * 4), 40) + lengthScore + cleanliness + keywordScore;
+}
+
+function selectFunnelCandidates(names, numerologyBatch, requestData, funnel, requestContext) {
+    const includeKeywords = parseKeywords(requestData.include_keywords);
+    const excludeKeywords = parseKeywords(requestData.exclude_keywords);
+    const seenLabels = new Set();
+    const stats = { poolSize: names.length, duplicates: 0, excluded: 0, verified: 0, topK: funnel.topK };
+
+    const ranked = [];
+    names.forEach((name, i) => {
+        const lowerName = String(name).toLowerCase();
+        if (excludeKeywords.some(keyword => lowerName.includes(keyword))) { stats.excluded++; return; }
+        const label = cleanDomainNameForApi(String(name));
+        if (seenLabels.has(label)) { stats.duplicates++; return; }
+        seenLabels.add(label);
+        const localScore = scoreCandidateLocally(String(name), numerologyBatch.overallHarmony[i], includeKeywords);
+        ranked.push({ name, index: i, localScore });
+    });
+    ranked.sort((a, b) => (b.localScore - a.localScore) || (a.index - b.index));
+
+    const selected = ranked.slice(0, funnel.topK);
+    stats.verified = selected.length;
+    requestContext.stats.funnel = stats;
+    return selected.map(candidate => ({ name: candidate.name, numerology: getBatchNumerology(numerologyBatch, candidate.index) }));
+}
+// --- End Candidate Funnel ---
+
+// --- Streaming Responses ---
+// Opt in with `"stream": true` / `"stream": "sse"` in the body, or an Accept header of
+// application/x-ndjson / text/event-stream. Frames are sent in this order:
+//   name (one per analyzed name, as each completes) -> founderAnalysis -> teamAnalysis (only with
+//   founders) -> optimalDates
+//   -> launchCalendar (only with launch_window) -> summary
+// The summary frame carries the ranked name ids and the usual metadata. In compact mode a dictionary
+// frame comes first and the name, founderAnalysis, teamAnalysis, launchCalendar and metadata payloads are
+// compacted.
+function getStreamFormat(req, requestData) {
+    const accept = req.headers.get('accept') || '';
+    if (requestData.stream === 'sse' || accept.includes('text/event-stream')) return 'sse';
+    if (requestData.stream === true || requestData.stream === 'ndjson' || accept.includes('application/x-ndjson')) return 'ndjson';
+    return null;
+}
+
+function encodeStreamFrame(format, type, data) {
+    if (format === 'sse') return `event: ${type}\ndata: ${JSON.stringify(data)}\n\n`;
+    return JSON.stringify({ type, data }) + '\n';
+}
+
+function streamAnalysisResponse(analysisTasks, requestData, requestContext, format) {
+    const encoder = new TextEncoder();
+    const body = new ReadableStream({
+        async start(controller) {
+            const send = (type, data) => controller.enqueue(encoder.encode(encodeStreamFrame(format, type, data)));
+            const compact = requestContext.compact;
+            try {
+                if (compact) send('dictionary', { meanings: MEANING_DICTIONARY });
+                const analyzedNames = new Array(analysisTasks.length);
+                await Promise.all(analysisTasks.map((task, i) => task.then(nameData => {
+                    analyzedNames[i] = nameData;
+                    send('name', compact ? compactName(nameData, compact.fields) : nameData);
+                })));
+
+                const founderAnalysis = buildFounderAnalysis(analyzedNames, requestData, requestContext);
+                send('founderAnalysis', compact ? compactFounderAnalysis(founderAnalysis) : founderAnalysis);
+                const teamAnalysis = buildTeamAnalysis(analyzedNames, requestData, requestContext);
+                if (teamAnalysis) send('teamAnalysis', compact ? compactTeamAnalysis(teamAnalysis) : teamAnalysis);
+                send('optimalDates', buildOptimalDates(analyzedNames, requestData, requestContext));
+                const launchCalendar = buildLaunchCalendar(analyzedNames, requestData, requestContext);
+                if (launchCalendar) send('launchCalendar', compact ? compactLaunchCalendar(launchCalendar) : launchCalendar);
+
+                await recordAnalytics(analyzedNames, requestData, requestContext);
+                const ranked = [...analyzedNames].sort((a, b) => (b.overallScore || 0) - (a.overallScore || 0));
+                const metadata = buildResponseMetadata(analyzedNames, requestData, requestContext);
+                send('summary', {
+                    ranking: ranked.map(nameData => ({ id: nameData.id, name: nameData.name, overallScore: nameData.overallScore })),
+                    metadata: compact ? compactMetadata(metadata) : metadata
+                });
+            } catch (error) {
+                console.error("Error while streaming generate-names results:", error);
+                send('error', { error: "Failed to generate business names", detail: error.message });
+            } finally {
+                requestContext.timer.finish();
+                controller.close();
+            }
+        }
+    });
+
+    return new Response(body, {
+        headers: {
+            "Content-Type": format === 'sse' ? "text/event-stream" : "application/x-ndjson",
+            "Cache-Control": "no-cache",
+            // Only the stages finished before the first byte; the summary frame carries the full timings
+            ...timingHeaders(requestContext)
+        },
+        status: 200,
+    });
+}
+// --- End Streaming Responses ---
+
+// --- Compact Responses ---
+// Opt in with `"compact": true` or `{ "fields": [...], "page_size": n }`. Names keep only the selected
+// fields (dotted paths such as "trademark.status" reach into nested objects; the default is what the
+// results view renders first). Numerology meanings become `meaningRef` keys into the response's
+// `dictionary.meanings`, domain maps shrink to { tld: points } with 0 meaning taken, and metadata
+// drops the request echo and diagnostics. Founder profiles in teamAnalysis get the same meaningRefs, and
+// launchCalendar dates keep their texts once per numerologyValue in `launchCalendar.energies`.
+// Names are paginated: the first page comes back inline, and `page.next` is the path of the next one
+// under GET /generate-names/results/{requestId}. The full list is stored in Postgres
+// (supabase/migrations/*_result_pages.sql) so any isolate can serve later pages; when there is no
+// database, or storing fails or does not finish within the request budget, every name comes back
+// inline on a single page.
+const COMPACT_DEFAULT_FIELDS = [
+    'id', 'name', 'overallScore', 'scoreBreakdown', 'numerology', 'domainAvailability', 'domainScore',
+    'trademark.status', 'trademark.riskLevel', 'entityCompliance'
+];
+// Paths must start at one of these top-level name fields and may only step through own properties
+const COMPACT_SELECTABLE_FIELDS = new Set([...COMPACT_DEFAULT_FIELDS.map(path => path.split('.')[0]), 'trademark', 'degraded', 'domainPrefilter']);
+const UNSAFE_PATH_SEGMENTS = new Set(['__proto__', 'constructor', 'prototype']);
+const COMPACT_DEFAULT_PAGE_SIZE = readIntEnv("COMPACT_PAGE_SIZE", 10);
+const COMPACT_MAX_PAGE_SIZE = 100;
+const MEANING_DICTIONARY = { ...MEANINGS, 0: "Unique energy pattern" }; // 0 holds the calculators' fallback meaning
+const MEANING_REFS = new Map(Object.entries(MEANING_DICTIONARY).map(([ref, meaning]) => [meaning, ref]));
+
+const LAUNCH_ENERGY_FIELDS = ['energyType', 'description', 'planetaryInfluence'];
+const RESULT_PAGES_TTL_SECONDS = readIntEnv("RESULT_PAGES_TTL_SECONDS", 10 * 60);
+
+function clampPageSize(value) {
+    const size = Math.floor(Number(value));
+    return Number.isFinite(size) && size > 0 ? Math.min(size, COMPACT_MAX_PAGE_SIZE) : COMPACT_DEFAULT_PAGE_SIZE;
+}
+
+function isSelectableField(path) {
+    const keys = path.split('.');
+    return COMPACT_SELECTABLE_FIELDS.has(keys[0]) && keys.every(key => key && !UNSAFE_PATH_SEGMENTS.has(key));
+}
+
+// Unknown or unsafe field paths are dropped; if none are left the defaults apply
+function getCompactOptions(requestData) {
+    if (!requestData.compact) return null;
+    const settings = typeof requestData.compact === 'object' ? requestData.compact : {};
+    const requested = Array.isArray(settings.fields) ? settings.fields.map(String).filter(isSelectableField) : [];
+    return { fields: requested.length > 0 ? requested : COMPACT_DEFAULT_FIELDS, pageSize: clampPageSize(settings.page_size) };
+}
+
+function selectFields(source, fields) {
+    const selected = {};
+    fields.forEach(path => {
+        const keys = path.split('.');
+        let from = source;
+        let to = selected;
+        for (let i = 0; i < keys.length; i++) {
+            const key = keys[i];
+            if (from === null || typeof from !== 'object' || !Object.hasOwn(from, key)) return;
+            if (i === keys.length - 1) {
+                to[key] = from[key];
+                return;
+            }
+            from = from[key];
+            to = to[key] = Object.hasOwn(to, key) && typeof to[key] === 'object' ? to[key] : {};
+        }
+    });
+    return selected;
+}
+
+function compactNumerology(numerology) {
+    if (!numerology) return numerology;
+    const result = {};
+    Object.entries(numerology).forEach(([system, block]) => {
+        const ref = typeof block?.meaning === 'string' ? MEANING_REFS.get(block.meaning) : undefined;
+        if (ref === undefined) {
+            result[system] = block;
+            return;
+        }
+        const { meaning, ...rest } = block;
+        result[system] = { ...rest, meaningRef: ref };
+    });
+    return result;
+}
+
+function compactName(nameData, fields) {
+    const selected = selectFields(nameData, fields);
+    if (selected.numerology) selected.numerology = compactNumerology(selected.numerology);
+    if (selected.domainAvailability) {
+        selected.domainAvailability = Object.fromEntries(Object.entries(selected.domainAvailability)
+            .map(([tld, info]) => [tld, info.available ? info.value : 0]));
+    }
+    return selected;
+}
+
+function compactFounderAnalysis(founderAnalysis) {
+    return founderAnalysis && { ...founderAnalysis, numerology: compactNumerology(founderAnalysis.numerology) };
+}
+
+function compactTeamAnalysis(teamAnalysis) {
+    return teamAnalysis && {
+        ...teamAnalysis,
+        founders: teamAnalysis.founders.map(founder => ({ ...founder, numerology: compactNumerology(founder.numerology) }))
+    };
+}
+
+// Moves the per-value texts of every launch date into `energies`, keyed on numerologyValue
+function compactLaunchDates(dates, energies) {
+    return dates.map(dateInfo => {
+        const compactDate = { ...dateInfo };
+        const texts = {};
+        LAUNCH_ENERGY_FIELDS.forEach(field => {
+            texts[field] = compactDate[field];
+            delete compactDate[field];
+        });
+        energies[dateInfo.numerologyValue] ??= texts;
+        return compactDate;
+    });
+}
+
+function compactLaunchCalendar(launchCalendar) {
+    if (!launchCalendar) return launchCalendar;
+    const energies = {};
+    const dates = Object.fromEntries(Object.entries(launchCalendar.dates).map(([name, nameDates]) => [name, compactLaunchDates(nameDates, energies)]));
+    return { ...launchCalendar, dates, energies };
+}
+
+function compactMetadata(metadata) {
+    return {
+        generatedAt: metadata.generatedAt,
+        totalNames: metadata.totalNames,
+        requestId: metadata.requestId,
+        sessionId: metadata.sessionId,
+        gemini: metadata.gemini,
+        degradedNames: metadata.deadline.degradedNames
+    };
+}
+
+function describePage(requestId, page, pageSize, totalNames) {
+    const totalPages = Math.max(1, Math.ceil(totalNames / pageSize));
+    return {
+        page, pageSize, totalNames, totalPages,
+        next: page < totalPages ? `results/${requestId}?page=${page + 1}&page_size=${pageSize}` : null
+    };
+}
+
+// Resolves to whether later pages can be served from the database. Waits only until `deadline`: a
+// store that has not finished by then is abandoned and the caller returns every name inline.
+async function storeResultPages(requestId, names, deadline) {
+    if (!isDatabaseConfigured() || deadline.signal.aborted) return false;
+    try {
+        await waitWithin(callRpc('store_result_pages', { p_request_id: requestId, p_names: names, p_ttl_seconds: RESULT_PAGES_TTL_SECONDS }), deadline);
+        return true;
+    } catch (e) {
+        if (isDeadlineAbort(e)) console.warn(`Result pages for ${requestId} not stored before the request deadline; returning every name inline`);
+        else console.error("Error storing result pages:", e);
+        return false;
+    }
+}
+
+async function buildCompactResult(result, compact, deadline) {
+    const names = result.names.map(nameData => compactName(nameData, compact.fields));
+    const requestId = result.metadata.requestId;
+    const paginated = names.length > compact.pageSize && await storeResultPages(requestId, names, deadline);
+    const pageSize = paginated ? compact.pageSize : Math.max(compact.pageSize, names.length);
+    const compactResult = {
+        names: names.slice(0, pageSize),
+        page: describePage(requestId, 1, pageSize, names.length),
+        dictionary: { meanings: MEANING_DICTIONARY },
+        founderAnalysis: compactFounderAnalysis(result.founderAnalysis),
+        optimalDates: result.optimalDates,
+        metadata: compactMetadata(result.metadata)
+    };
+    if (result.launchCalendar) compactResult.launchCalendar = compactLaunchCalendar(result.launchCalendar);
+    if (result.teamAnalysis) compactResult.teamAnalysis = compactTeamAnalysis(result.teamAnalysis);
+    return compactResult;
+}
+
+// Later pages of a compact result; the client already holds the dictionary from the first one.
+// Resolves to null for unknown or expired results.
+async function getResultPage(requestId, page, pageSize) {
+    if (!isDatabaseConfigured() || !isUuid(requestId)) return null;
+    const size = clampPageSize(pageSize);
+    const number = Math.max(1, Math.floor(Number(page)) || 1);
+    const stored = await callRpc('result_page', { p_request_id: requestId, p_offset: (number - 1) * size, p_limit: size });
+    return stored && { names: stored.names, page: describePage(requestId, number, size, stored.totalNames) };
+}
+// --- End Compact Responses ---
+
+// --- Bulk Scoring Jobs ---
+// POST /generate-names/bulk scores a caller-supplied list of names with analyzeSingleName, without Gemini.
+// Body: CSV (first column, or a `name` column when there is a header row) or NDJSON (one
+// `{"name": ...}` object or JSON string per line). Query parameters: industry, chunk_size, resume_from,
+// job_id. Rows are processed in chunks of chunk_size (each chunk's names run concurrently, with the
+// scheduler capping upstream calls) and streamed back as NDJSON frames:
+//   job -> result | invalid (one per row, as each completes) -> progress (after each chunk) -> done | paused
+// Rows without a name (a blank CSV cell, an NDJSON row with no `name`) get an `invalid` frame and are
+// not scored; they keep their place, so row numbers and resume_from stay aligned with the input.
+// A job that runs out of time budget ends with a `paused` frame. Re-posting the same body with
+// resume_from=<nextRow> (and job_id, which must match) continues where it stopped.
+// Each chunk's deadline is sized from its length and the Domainr/USPTO rate limits, and chunk_size is
+// lowered to what fits REQUEST_DEADLINE_MAX_MS. Rows that still come back degraded (an upstream check
+// missed the deadline) are listed in the chunk's `progress` frame as degradedRows and counted
+// in `done`/`paused`, so the caller can re-post just those names.
+const BULK_MAX_ROWS = readIntEnv("BULK_MAX_ROWS", 50000);
+const BULK_DEFAULT_CHUNK_SIZE = 25;
+const BULK_MAX_CHUNK_SIZE = 100;
+const BULK_TIME_BUDGET_MS = readIntEnv("BULK_TIME_BUDGET_MS", 120000);
+const BULK_DEADLINE_MARGIN_MS = 5000;
+// Worst-case upstream calls per name: one Domainr status call; the exact USPTO search plus three variations
+const BULK_CALLS_PER_NAME = [[DOMAINR_API_BASE_URL, 1], [USPTO_API_BASE_URL, 4]];
+
+// Time for the slowest host to drain a chunk's calls at its configured rate, plus a margin
+function bulkChunkDeadlineMs(chunkLength) {
+    const stats = getSchedulerStats();
+    const drainMs = Math.max(...BULK_CALLS_PER_NAME.map(([baseUrl, callsPerName]) => {
+        const limits = stats[new URL(baseUrl).host]?.limits;
+        if (!limits) return 0;
+        return Math.max(0, chunkLength * callsPerName - limits.burst) / limits.ratePerSecond * 1000;
+    }));
+    return Math.max(DEFAULT_DEADLINE_MS, Math.ceil(drainMs) + BULK_DEADLINE_MARGIN_MS);
+}
+
+function parseCsvLine(line) {
+    const cells = [];
+    let cell = '', quoted = false;
+    for (let i = 0; i < line.length; i++) {
+        const char = line[i];
+        if (quoted) {
+            if (char === '"' && line[i + 1] === '"') { cell += '"'; i++; }
+            else if (char === '"') quoted = false;
+            else cell += char;
+        } else if (char === '"') quoted = true;
+        else if (char === ',') { cells.push(cell); cell = ''; }
+        else cell += char;
+    }
+    cells.push(cell);
+    return cells.map(value => value.trim());
+}
+
+function parseBulkNames(text, contentType) {
+    const lines = text.split(/\r?\n/).filter(line => line.trim());
+    if (contentType.includes('ndjson') || contentType.includes('jsonl')) {
+        return lines.map(line => {
+            const row = JSON.parse(line);
+            const name = typeof row === 'string' ? row : row?.name;
+            return typeof name === 'string' ? name.trim() : '';
+        });
+    }
+    const header = parseCsvLine(lines[0] ?? '').map(cell => cell.toLowerCase());
+    const nameColumn = header.indexOf('name');
+    const rows = nameColumn === -1 ? lines : lines.slice(1);
+    return rows.map(line => parseCsvLine(line)[Math.max(nameColumn, 0)] ?? '');
+}
+
+async function hashJobInput(text) {
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest).slice(0, 8), byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+async function handleBulkJob(req) {
+    const url = new URL(req.url);
+    const contentType = req.headers.get('content-type') || 'text/csv';
+    const text = await req.text();
+    const jsonError = (error, status) => new Response(JSON.stringify({ error }), {
+        headers: { "Content-Type": "application/json", 'Access-Control-Allow-Origin': '*' },
+        status,
+    });
+
+    let names;
+    try {
+        names = parseBulkNames(text, contentType);
+    } catch (e) {
+        return jsonError(`Could not parse bulk input: ${e.message}`, 400);
+    }
+    if (!names.some(Boolean)) return jsonError("No names found in bulk input", 400);
+    if (names.length > BULK_MAX_ROWS) return jsonError(`Bulk input has ${names.length} rows; the limit is ${BULK_MAX_ROWS}`, 413);
+
+    const jobId = await hashJobInput(text);
+    const requestedJobId = url.searchParams.get('job_id');
+    if (requestedJobId && requestedJobId !== jobId) {
+        return jsonError(`job_id ${requestedJobId} does not match this input (${jobId}); resume with the original file`, 409);
+    }
+    const resumeFrom = Math.min(names.length, Math.max(0, parseInt(url.searchParams.get('resume_from') ?? '0', 10) || 0));
+    let chunkSize = Math.min(BULK_MAX_CHUNK_SIZE, Math.max(1, parseInt(url.searchParams.get('chunk_size') ?? '', 10) || BULK_DEFAULT_CHUNK_SIZE));
+    while (chunkSize > 1 && bulkChunkDeadlineMs(chunkSize) > MAX_DEADLINE_MS) chunkSize--;
+    const requestData = { industry: url.searchParams.get('industry') || '' };
+    const startedAt = Date.now();
+
+    const encoder = new TextEncoder();
+    const body = new ReadableStream({
+        async start(controller) {
+            const send = (type, data) => controller.enqueue(encoder.encode(encodeStreamFrame('ndjson', type, data)));
+            let nextRow = resumeFrom;
+            let degraded = 0;
+            try {
+                send('job', { jobId, totalRows: names.length, resumeFrom, chunkSize });
+                while (nextRow < names.length) {
+                    if (Date.now() - startedAt > BULK_TIME_BUDGET_MS) {
+                        send('paused', { jobId, reason: 'time_budget', processed: nextRow, total: names.length, nextRow, degraded });
+                        return;
+                    }
+                    const chunk = names.slice(nextRow, nextRow + chunkSize);
+                    const chunkStart = nextRow;
+                    // A fresh context per chunk gives every chunk its own deadline budget
+                    const requestContext = createRequestContext({ ...requestData, deadline_ms: bulkChunkDeadlineMs(chunk.length) });
+                    const numerologyBatch = requestContext.timer.timeSync('numerology', () => scoreNamesBatch(chunk));
+                    const degradedRows = [];
+                    await Promise.all(chunk.map((name, i) => {
+                        if (!name) {
+                            send('invalid', { row: chunkStart + i, error: "Row has no name" });
+                            return null;
+                        }
+                        return analyzeSingleName(name, requestData, chunkStart + i + 1, getBatchNumerology(numerologyBatch, i), requestContext)
+                            .then(nameData => {
+                                if (nameData.degraded.length > 0) degradedRows.push(chunkStart + i);
+                                send('result', { row: chunkStart + i, ...nameData });
+                            });
+                    }));
+                    nextRow += chunk.length;
+                    degraded += degradedRows.length;
+                    degradedRows.sort((a, b) => a - b);
+                    send('progress', { jobId, processed: nextRow, total: names.length, nextRow, degradedRows, elapsedMs: Date.now() - startedAt });
+                }
+                send('done', { jobId, processed: names.length, total: names.length, degraded, elapsedMs: Date.now() - startedAt });
+            } catch (error) {
+                console.error("Error in bulk scoring job:", error);
+                send('error', { jobId, error: "Bulk scoring failed", detail: error.message, nextRow });
+            } finally {
+                controller.close();
+            }
+        }
+    });
+
+    return new Response(body, {
+        headers: { "Content-Type": "application/x-ndjson", "Cache-Control": "no-cache", 'Access-Control-Allow-Origin': '*' },
+        status: 200,
+    });
+}
+// --- End Bulk Scoring Jobs ---
+
+// --- Metrics ---
+function timingHeaders(requestContext) {
+    return {
+        'Server-Timing': requestContext.timer.serverTimingHeader(),
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Expose-Headers': 'Server-Timing',
+        'Timing-Allow-Origin': '*'
+    };
+}
+
+function getIsolateMetrics() {
+    return {
+        function: "generate-names",
+        timestamp: new Date().toISOString(),
+        latency: getLatencySnapshot(),
+        upstream: getSchedulerStats(),
+        cache: { gemini: geminiCache.stats(), domains: domainCache.stats(), trademarks: trademarkCache.stats() },
+        trademarkIndex: getTrademarkIndexStats(),
+        domainPrefilter: getDomainPrefilterStats(),
+        memory: Deno.memoryUsage()
+    };
+}
+// --- End Metrics ---
+
 // --- Request Handler ---
 export default async (req) => {
   console.log("generate-names function invoked, method:", req.method);
@@ -486,12 +1299,59 @@ export default async (req) => {
     return new Response(null, {
       headers: {
         'Access-Control-Allow-Origin': '*', // Be more specific in production
-        'Access-Control-Allow-Methods': 'POST, OPTIONS',
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
         'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type',
       },
     });
   }
 
+  // Metrics view for this isolate; the health function aggregates it under GET /health?view=metrics
+  if (req.method === 'GET' && new URL(req.url).searchParams.get('view') === 'metrics') {
+    return new Response(JSON.stringify(getIsolateMetrics()), {
+      headers: { "Content-Type": "application/json", 'Access-Control-Allow-Origin': '*' },
+      status: 200,
+    });
+  }
+
+  // GET /generate-names/analytics/summary, /generate-names/generation-history/{sessionId}?offset=&limit=
+  // and /generate-names/results/{requestId}?page=&page_size=
+  if (req.method === 'GET') {
+    const url = new URL(req.url);
+    const jsonResponse = (payload, status) => new Response(JSON.stringify(payload), {
+      headers: { "Content-Type": "application/json", 'Access-Control-Allow-Origin': '*' },
+      status,
+    });
+    const resultsMatch = url.pathname.match(/\/results\/([^/]+)\/?$/);
+    if (resultsMatch) {
+      let resultPage;
+      try {
+        resultPage = await getResultPage(decodeURIComponent(resultsMatch[1]), url.searchParams.get('page'), url.searchParams.get('page_size'));
+      } catch (error) {
+        console.error("Error reading result pages:", error);
+        return jsonResponse({ error: "Failed to read result pages", detail: error.message }, 500);
+      }
+      return createEncodedResponse(req, JSON.stringify(resultPage ?? { error: "Result pages expired or not found" }), {
+        headers: { "Content-Type": "application/json", 'Access-Control-Allow-Origin': '*' },
+        status: resultPage ? 200 : 404,
+      });
+    }
+    const historyMatch = url.pathname.match(/\/generation-history\/([^/]+)\/?$/);
+    if (historyMatch || url.pathname.endsWith('/analytics/summary')) {
+      if (!isAnalyticsEnabled()) return jsonResponse({ error: "Analytics storage is not configured" }, 503);
+      try {
+        if (!historyMatch) return jsonResponse(await getAnalyticsSummary(), 200);
+        const history = await getGenerationHistory(decodeURIComponent(historyMatch[1]), {
+          offset: url.searchParams.get('offset') ?? undefined,
+          limit: url.searchParams.get('limit') ?? undefined
+        });
+        return jsonResponse(history ?? { error: "No generation history for this session" }, history ? 200 : 404);
+      } catch (error) {
+        console.error("Error reading analytics:", error);
+        return jsonResponse({ error: "Failed to read analytics", detail: error.message }, 500);
+      }
+    }
+  }
+
   if (req.method !== 'POST') {
     return new Response(JSON.stringify({ error: `Method ${req.method} Not Allowed` }), {
       headers: { "Content-Type": "application/json", 'Access-Control-Allow-Origin': '*' },
@@ -499,6 +1359,10 @@ export default async (req) => {
     });
   }
 
+  if (new URL(req.url).pathname.endsWith('/bulk')) {
+    return handleBulkJob(req);
+  }
+
   try {
     const requestData = await req.json();
     console.log("Request data:", requestData);
@@ -511,65 +1375,68 @@ export default async (req) => {
       });
     }
 
-    const generatedNamesRaw = await generateNamesWithGemini(requestData);
+    const requestContext = createRequestContext(requestData);
+    const funnel = getFunnelOptions(requestData);
+    const geminiRequest = funnel ? { ...requestData, num_suggestions: funnel.poolSize } : requestData;
+    const generatedNamesRaw = await requestContext.timer.time('gemini', () =>
+        generateNamesWithGemini(geminiRequest, upstreamDeadline(requestContext.deadline.geminiDeadline), requestContext));
     if (!generatedNamesRaw || generatedNamesRaw.length === 0) {
         throw new Error("Failed to generate names from Gemini AI service");
     }
 
-    const analysisTasks = generatedNamesRaw.map((name, i) => analyzeSingleName(name, requestData, i + 1));
+    // Score every candidate's numerology in one batch pass before the upstream checks fan out
+    const numerologyBatch = requestContext.timer.timeSync('numerology', () => scoreNamesBatch(generatedNamesRaw));
+    const candidates = funnel
+        ? requestContext.timer.timeSync('funnel', () => selectFunnelCandidates(generatedNamesRaw, numerologyBatch, requestData, funnel, requestContext))
+        : generatedNamesRaw.map((name, i) => ({ name, numerology: getBatchNumerology(numerologyBatch, i) }));
+    const analysisTasks = candidates.map((candidate, i) => analyzeSingleName(candidate.name, requestData, i + 1, candidate.numerology, requestContext));
+    const streamFormat = getStreamFormat(req, requestData);
+    if (streamFormat) {
+        return streamAnalysisResponse(analysisTasks, requestData, requestContext, streamFormat);
+    }
+
     // Promise.all for concurrent execution (Deno handles concurrency well)
     const analyzedNames = await Promise.all(analysisTasks);
 
-    let founderAnalysis = null;
-    if (requestData.founder_name && requestData.founder_birthdate) {
-        const founderNumerology = calculateFounderNumerology(requestData.founder_name, requestData.founder_birthdate);
-        const compatibility = {};
-        analyzedNames.forEach(nameData => {
-            compatibility[nameData.name] = calculateNameCompatibility(
-                nameData.name, requestData.founder_name, requestData.founder_birthdate
-            );
-        });
-        founderAnalysis = {
-            name: requestData.founder_name,
-            birthdate: requestData.founder_birthdate,
-            numerology: founderNumerology,
-            compatibility
-        };
-    }
-
-    let optimalDates = [];
-    if (analyzedNames.length > 0 && requestData.founder_birthdate) {
-        try {
-            const bestName = analyzedNames.reduce((max, name) => (name.overallScore > max.overallScore ? name : max), analyzedNames[0]);
-            optimalDates = calculateOptimalDates(bestName.name, requestData.founder_birthdate);
-        } catch (e) { console.error("Error calculating optimal dates:", e); }
-    }
+    const founderAnalysis = buildFounderAnalysis(analyzedNames, requestData, requestContext);
+    const optimalDates = buildOptimalDates(analyzedNames, requestData, requestContext);
+    const launchCalendar = buildLaunchCalendar(analyzedNames, requestData, requestContext);
+    const teamAnalysis = buildTeamAnalysis(analyzedNames, requestData, requestContext);
 
     analyzedNames.sort((a, b) => (b.overallScore || 0) - (a.overallScore || 0));
+    await recordAnalytics(analyzedNames, requestData, requestContext);
 
     const result = {
         names: analyzedNames,
         founderAnalysis,
         optimalDates,
-        metadata: {
-            generatedAt: new Date().toISOString(),
-            totalNames: analyzedNames.length,
-            requestId: crypto.randomUUID(), // Deno's built-in UUID
-            sessionId: crypto.randomUUID(), // Using for session too
-            requestData // Echo back the request data
-        }
+        launchCalendar,
+        teamAnalysis,
+        metadata: buildResponseMetadata(analyzedNames, requestData, requestContext)
     };
 
-    return new Response(JSON.stringify(result), {
-      headers: { "Content-Type": "application/json", 'Access-Control-Allow-Origin': '*' },
+    const payload = requestContext.compact
+        ? await requestContext.timer.time('paginate', () => buildCompactResult(result, requestContext.compact, requestDeadline(requestContext)))
+        : result;
+    const body = requestContext.timer.timeSync('serialize', () => JSON.stringify(payload));
+    const response = await requestContext.timer.time('compress', () => createEncodedResponse(req, body, {
+      headers: { "Content-Type": "application/json" },
       status: 200,
-    });
+    }));
+    requestContext.timer.finish();
+    Object.entries(timingHeaders(requestContext)).forEach(([name, value]) => response.headers.set(name, value));
+    return response;
 
   } catch (error) {
     console.error("Error in generate-names function:", error.message, error.stack);
-    return new Response(JSON.stringify({ error: "Failed to generate business names", detail: error.message }), {
+    // Only the Gemini stage lets a deadline abort escape; every later stage degrades instead
+    const timedOut = isDeadlineAbort(error);
+    return new Response(JSON.stringify({
+      error: timedOut ? "Name generation did not finish within the request deadline" : "Failed to generate business names",
+      detail: error.message
+    }), {
       headers: { "Content-Type": "application/json", 'Access-Control-Allow-Origin': '*' },
-      status: 500,
+      status: timedOut ? 504 : 500,
     });
   }
 };
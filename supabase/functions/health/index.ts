@@ -1,9 +1,44 @@
 // @ts-check
 // Follow this pattern to import standard ES Modules in Deno:
 // import * as mod from "https://deno.land/std@0.170.0/log/mod.ts";
+import { readIntEnv } from "../_shared/cache.ts";
 
 console.log("Health function cold start");
 
+// Functions whose in-isolate latency histograms are included in GET /health?view=metrics
+const METRICS_FUNCTIONS = ['generate-names'];
+// A function that does not answer in time is reported with an error instead of holding up the view
+const METRICS_TIMEOUT_MS = readIntEnv("HEALTH_METRICS_TIMEOUT_MS", 2000);
+
+// Each function runs in its own isolate, so the metrics view asks every function for its own
+// snapshot (p50/p95/p99 per stage and per upstream host) rather than reading shared memory.
+async function collectMetrics(req) {
+  const functionsBaseUrl = Deno.env.get("SUPABASE_FUNCTIONS_URL") ||
+    `${Deno.env.get("SUPABASE_URL") ?? new URL(req.url).origin}/functions/v1`;
+  const headers = {};
+  const authorization = req.headers.get('authorization');
+  if (authorization) headers['authorization'] = authorization;
+
+  const functions = {};
+  await Promise.all(METRICS_FUNCTIONS.map(async (name) => {
+    try {
+      const response = await fetch(`${functionsBaseUrl}/${name}?view=metrics`, {
+        headers,
+        signal: AbortSignal.timeout(METRICS_TIMEOUT_MS)
+      });
+      functions[name] = response.ok ? await response.json() : { error: `status ${response.status}` };
+    } catch (e) {
+      functions[name] = { error: e.message };
+    }
+  }));
+
+  return {
+    status: "healthy",
+    timestamp: new Date().toISOString(),
+    functions
+  };
+}
+
 export default async (req) => {
   console.log("Health function invoked");
 
@@ -18,6 +53,19 @@ export default async (req) => {
     });
   }
 
+  if (req.method === 'GET' && new URL(req.url).searchParams.get('view') === 'metrics') {
+    return new Response(
+      JSON.stringify(await collectMetrics(req)),
+      {
+        headers: { 
+          "Content-Type": "application/json",
+          'Access-Control-Allow-Origin': '*' // Adjust for production
+        },
+        status: 200
+      }
+    );
+  }
+
   if (req.method === 'GET') {
     const data = {
       status: "healthy",
@@ -0,0 +1,231 @@
+-- Generation analytics for the generate-names function.
+-- Counters, hourly request buckets and per-industry counts are upserted by record_generation() as each
+-- generation finishes, so analytics_summary() only reads a handful of rows and every isolate sees the
+-- same figures. Only the function's service role uses these tables: RLS is on with no policies and
+-- the functions are not executable by anon or authenticated.
+--
+-- Counters every generation touches are spread over 16 shard rows picked at random, so concurrent
+-- writers rarely wait on the same row lock; reads sum the shards. Every table stays bounded: hourly
+-- buckets older than the 24h window are pruned at write time and industries are a fixed-size
+-- Space-Saving top-K sketch.
+
+create table if not exists public.analytics_totals (
+    shard smallint primary key check (shard between 0 and 15),
+    total_requests bigint not null default 0,
+    total_names_generated bigint not null default 0,
+    live_sessions bigint not null default 0
+);
+
+create table if not exists public.analytics_hourly (
+    hour timestamptz not null,
+    shard smallint not null check (shard between 0 and 15),
+    requests integer not null default 0,
+    primary key (hour, shard)
+);
+
+-- At most p_industry_slots rows. An unseen industry replaces the smallest counter and inherits its
+-- count as overestimation error, so heavy hitters are never lost.
+create table if not exists public.analytics_industries (
+    industry text primary key,
+    requests bigint not null default 0,
+    error bigint not null default 0
+);
+create index if not exists analytics_industries_requests_idx on public.analytics_industries (requests);
+
+-- Session ids are issued here by gen_random_uuid(), never chosen by the client. History keeps scores
+-- and domain/trademark results only: no founder name, birthdate or business description is stored.
+create table if not exists public.generation_sessions (
+    session_id uuid primary key default gen_random_uuid(),
+    industry text,
+    generations integer not null default 0,
+    total_names integer not null default 0,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+create index if not exists generation_sessions_updated_at_idx on public.generation_sessions (updated_at);
+
+create table if not exists public.generation_history_names (
+    id bigint generated always as identity primary key,
+    session_id uuid not null references public.generation_sessions (session_id) on delete cascade,
+    name text not null,
+    overall_score numeric,
+    score_breakdown jsonb,
+    domain_availability jsonb,
+    trademark_status text,
+    generated_at timestamptz not null default now()
+);
+create index if not exists generation_history_names_session_idx on public.generation_history_names (session_id, id desc);
+
+alter table public.analytics_totals enable row level security;
+alter table public.analytics_hourly enable row level security;
+alter table public.analytics_industries enable row level security;
+alter table public.generation_sessions enable row level security;
+alter table public.generation_history_names enable row level security;
+
+-- Records one generation and returns the session it was added to: p_session_id when it names a live
+-- session issued here, otherwise a newly issued one. Sessions idle longer than p_session_ttl_seconds
+-- are dropped, and each session keeps only its newest p_keep_names names.
+create or replace function public.record_generation(
+    p_session_id uuid,
+    p_industry text,
+    p_names jsonb,
+    p_keep_names integer,
+    p_session_ttl_seconds integer,
+    p_industry_slots integer
+) returns uuid
+language plpgsql
+set search_path = public
+as $$
+declare
+    v_now timestamptz := now();
+    v_hour timestamptz := date_trunc('hour', now());
+    v_shard smallint := floor(random() * 16)::smallint;
+    v_name_count integer := jsonb_array_length(p_names);
+    v_expired_sessions integer;
+    v_new_sessions integer := 0;
+    v_min_industry text;
+    v_min_requests bigint;
+    v_session_id uuid;
+begin
+    insert into analytics_hourly as h (hour, shard, requests)
+    values (v_hour, v_shard, 1)
+    on conflict (hour, shard) do update set requests = h.requests + 1;
+
+    delete from analytics_hourly where hour <= v_hour - interval '24 hours';
+
+    update analytics_industries set requests = requests + 1 where industry = p_industry;
+    if not found then
+        -- Adding or replacing a counter is serialized so the sketch never grows past p_industry_slots
+        perform pg_advisory_xact_lock(hashtext('analytics_industries'));
+        update analytics_industries set requests = requests + 1 where industry = p_industry;
+        if not found then
+            if (select count(*) from analytics_industries) < p_industry_slots then
+                insert into analytics_industries (industry, requests) values (p_industry, 1);
+            else
+                select industry, requests into v_min_industry, v_min_requests
+                from analytics_industries order by requests, industry limit 1;
+                update analytics_industries
+                set industry = p_industry, requests = v_min_requests + 1, error = v_min_requests
+                where industry = v_min_industry;
+            end if;
+        end if;
+    end if;
+
+    delete from generation_sessions
+    where updated_at <= v_now - make_interval(secs => p_session_ttl_seconds);
+    get diagnostics v_expired_sessions = row_count;
+
+    update generation_sessions
+    set industry = p_industry,
+        generations = generations + 1,
+        total_names = total_names + v_name_count,
+        updated_at = v_now
+    where session_id = p_session_id
+    returning session_id into v_session_id;
+
+    if v_session_id is null then
+        insert into generation_sessions (industry, generations, total_names)
+        values (p_industry, 1, v_name_count)
+        returning session_id into v_session_id;
+        v_new_sessions := 1;
+    end if;
+
+    insert into analytics_totals as t (shard, total_requests, total_names_generated, live_sessions)
+    values (v_shard, 1, v_name_count, v_new_sessions - v_expired_sessions)
+    on conflict (shard) do update
+        set total_requests = t.total_requests + 1,
+            total_names_generated = t.total_names_generated + excluded.total_names_generated,
+            live_sessions = t.live_sessions + excluded.live_sessions;
+
+    -- Inserted last-to-first so that, read newest id first, each generation keeps its ranking order
+    insert into generation_history_names
+        (session_id, name, overall_score, score_breakdown, domain_availability, trademark_status, generated_at)
+    select v_session_id, n.value->>'name', (n.value->>'overallScore')::numeric, n.value->'scoreBreakdown',
+           n.value->'domainAvailability', n.value->>'trademarkStatus', v_now
+    from jsonb_array_elements(p_names) with ordinality as n(value, position)
+    order by n.position desc;
+
+    delete from generation_history_names
+    where session_id = v_session_id
+      and id <= (
+          select id from generation_history_names
+          where session_id = v_session_id
+          order by id desc
+          offset p_keep_names limit 1
+      );
+
+    return v_session_id;
+end;
+$$;
+
+-- Reads at most 16 total shards, 16 * 24 hourly rows and the industry sketch. trackedSessions counts
+-- sessions that have not been dropped yet; expired ones are dropped by the next record_generation().
+create or replace function public.analytics_summary(p_top integer)
+returns jsonb
+language sql
+stable
+set search_path = public
+as $$
+    select jsonb_build_object(
+        'totalRequests', coalesce((select sum(total_requests) from analytics_totals), 0),
+        'totalNamesGenerated', coalesce((select sum(total_names_generated) from analytics_totals), 0),
+        'recentRequests24h', coalesce((
+            select sum(requests) from analytics_hourly
+            where hour > date_trunc('hour', now()) - interval '24 hours'
+        ), 0),
+        'popularIndustries', coalesce((
+            select jsonb_agg(jsonb_build_object('_id', top.industry, 'count', top.requests, 'error', top.error) order by top.requests desc)
+            from (select industry, requests, error from analytics_industries order by requests desc limit p_top) top
+        ), '[]'::jsonb),
+        'trackedSessions', coalesce((select sum(live_sessions) from analytics_totals), 0)
+    );
+$$;
+
+-- One page of a live session's names, newest first; null when the session is unknown or expired
+create or replace function public.generation_history(
+    p_session_id uuid,
+    p_offset integer,
+    p_limit integer,
+    p_session_ttl_seconds integer
+) returns jsonb
+language sql
+stable
+set search_path = public
+as $$
+    select jsonb_build_object(
+        'sessionId', s.session_id,
+        -- The latest request, reduced to fields that say nothing about the founder
+        'request', jsonb_build_object('session_id', s.session_id, 'industry', s.industry),
+        'generatedNames', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'name', page.name,
+                'overallScore', page.overall_score,
+                'scoreBreakdown', page.score_breakdown,
+                'domainAvailability', page.domain_availability,
+                'trademarkStatus', page.trademark_status,
+                'generatedAt', page.generated_at
+            ) order by page.id desc)
+            from (
+                select * from generation_history_names
+                where session_id = s.session_id
+                order by id desc
+                offset p_offset limit p_limit
+            ) page
+        ), '[]'::jsonb),
+        'storedNames', (select count(*) from generation_history_names where session_id = s.session_id),
+        'totalNames', s.total_names,
+        'generations', s.generations,
+        'createdAt', s.created_at,
+        'updatedAt', s.updated_at
+    )
+    from generation_sessions s
+    where s.session_id = p_session_id
+      and s.updated_at > now() - make_interval(secs => p_session_ttl_seconds);
+$$;
+
+revoke execute on function public.record_generation(uuid, text, jsonb, integer, integer, integer) from public, anon, authenticated;
+revoke execute on function public.analytics_summary(integer) from public, anon, authenticated;
+revoke execute on function public.generation_history(uuid, integer, integer, integer) from public, anon, authenticated;
+grant execute on function public.record_generation(uuid, text, jsonb, integer, integer, integer) to service_role;
+grant execute on function public.analytics_summary(integer) to service_role;
+grant execute on function public.generation_history(uuid, integer, integer, integer) to service_role;
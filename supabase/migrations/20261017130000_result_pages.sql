@@ -0,0 +1,48 @@
+-- Paginated compact results of the generate-names function. The compacted names of a response are
+-- stored once under its request id, so GET /generate-names/results/{requestId} can be answered by any
+-- isolate. Rows expire after the TTL the function passes in; store_result_pages() clears expired ones.
+-- Only the function's service role uses the table.
+
+create table if not exists public.result_pages (
+    request_id uuid primary key,
+    names jsonb not null,
+    total_names integer not null,
+    expires_at timestamptz not null
+);
+create index if not exists result_pages_expires_at_idx on public.result_pages (expires_at);
+
+alter table public.result_pages enable row level security;
+
+create or replace function public.store_result_pages(p_request_id uuid, p_names jsonb, p_ttl_seconds integer)
+returns void
+language sql
+set search_path = public
+as $$
+    delete from result_pages where expires_at <= now();
+    insert into result_pages (request_id, names, total_names, expires_at)
+    values (p_request_id, p_names, jsonb_array_length(p_names), now() + make_interval(secs => p_ttl_seconds));
+$$;
+
+-- { names, totalNames } for names p_offset + 1 .. p_offset + p_limit; null when unknown or expired
+create or replace function public.result_page(p_request_id uuid, p_offset integer, p_limit integer)
+returns jsonb
+language sql
+stable
+set search_path = public
+as $$
+    select jsonb_build_object(
+        'names', coalesce((
+            select jsonb_agg(page.value order by page.position)
+            from jsonb_array_elements(result_pages.names) with ordinality as page(value, position)
+            where page.position > p_offset and page.position <= p_offset + p_limit
+        ), '[]'::jsonb),
+        'totalNames', result_pages.total_names
+    )
+    from result_pages
+    where request_id = p_request_id and expires_at > now();
+$$;
+
+revoke execute on function public.store_result_pages(uuid, jsonb, integer) from public, anon, authenticated;
+revoke execute on function public.result_page(uuid, integer, integer) from public, anon, authenticated;
+grant execute on function public.store_result_pages(uuid, jsonb, integer) to service_role;
+grant execute on function public.result_page(uuid, integer, integer) to service_role;